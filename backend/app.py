@@ -1,10 +1,12 @@
-import math
-from flask import Flask, request, jsonify
+import hashlib
+from flask import Flask, request, jsonify, Response
 from flask_cors import CORS
 
 from query_transformer import transform_query, extract_location_from_query
 from database import get_db_connection
 from geocoding import geocode_location
+from spatial_index import get_spatial_index, filter_by_ids, filter_within_radius
+from prepared_queries import PREPARED_QUERY_WAIT, PreparedQueryCache
 
 app = Flask(__name__)
 CORS(app, resources={r"/api/*": {"origins": "http://localhost:5173"}})
@@ -12,61 +14,75 @@ CORS(app, resources={r"/api/*": {"origins": "http://localhost:5173"}})
 BLR_LAT, BLR_LON = 12.9716, 77.5946  # Default to Bangalore center
 BLR_RADIUS = 100
 ZONAL_RADIUS = 5
+MAX_DETAILS_BATCH = 500  # Stay well below SQLite's bound parameter limit
+MAX_NEAREST = 500
+MIN_PREPARE_QUERY_LENGTH = 10  # Partial queries shorter than this are not worth an LLM call
+MAX_STATS_ROWS = 1000
+STATS_DIMENSIONS = ("promoter", "year", "taluk", "status", "geohash")
 
+PROJECT_DETAILS_COLUMNS = """project_name, promoter_name, rera_registration_number,
+           source_of_water, approving_authority, project_start_date, proposed_completion_date"""
 
-def haversine_distance(lat1, lon1, lat2, lon2):
-    R = 6371  # Earth radius in kilometers
 
-    lat1, lon1, lat2, lon2 = map(math.radians, [lat1, lon1, lat2, lon2])
-
-    dlat = lat2 - lat1
-    dlon = lon2 - lon1
-
-    a = (
-        math.sin(dlat / 2) ** 2
-        + math.cos(lat1) * math.cos(lat2) * math.sin(dlon / 2) ** 2
-    )
-    c = 2 * math.asin(math.sqrt(a))
-
-    return R * c
-
-
-def filter_results_by_distance(results, center_lat, center_lon, max_distance_km):
-    return [
-        result
-        for result in results
-        if haversine_distance(
-            center_lat,
-            center_lon,
-            float(result["latitude"]),
-            float(result["longitude"]),
-        )
-        <= max_distance_km
-    ]
+def parse_search_mode(params):
+    """
+    Validate the optional spatial search parameters of /api/projects:
+    `nearest` (number of closest projects to return) or `polygon`
+    (list of [latitude, longitude] vertices).
+    """
+    nearest, polygon = params.get("nearest"), params.get("polygon")
+    if nearest is not None and polygon is not None:
+        raise ValueError("Use either nearest or polygon, not both")
+    if nearest is not None:
+        # bool is a subclass of int, but {"nearest": true} is not a count
+        if (
+            not isinstance(nearest, int)
+            or isinstance(nearest, bool)
+            or not 0 < nearest <= MAX_NEAREST
+        ):
+            raise ValueError(f"nearest must be an integer between 1 and {MAX_NEAREST}")
+    if polygon is not None:
+        try:
+            polygon = [(float(lat), float(lon)) for lat, lon in polygon]
+        except (TypeError, ValueError):
+            raise ValueError("polygon must be a list of [latitude, longitude] pairs")
+        if len(polygon) < 3:
+            raise ValueError("polygon needs at least 3 vertices")
+    return nearest, polygon
 
 
 @app.route("/api/projects", methods=["POST"])
 def get_projects():
+    params = request.get_json(silent=True)
+    if not isinstance(params, dict):
+        return jsonify({"error": "Request body must be a JSON object"}), 400
     try:
-        user_query = request.json["query"]
-        db = get_db_connection()
+        nearest, polygon = parse_search_mode(params)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
-        extracted_info = extract_location_from_query(user_query)
-        location, query_without_location = (
-            extracted_info["location"],
-            extracted_info["query"],
-        )
-        center_lat, center_lon, max_distance_km = get_zonal_coordinates(location)
+    try:
+        user_query = params["query"]
+        db = get_db_connection()
 
         print(f"User query: {user_query}")
-        sql_query = transform_query(query_without_location, db)
+        plan = get_query_plan(user_query, db)
+        center_lat, center_lon, max_distance_km = plan["coordinates"]
+        sql_query = plan["sql_query"]
         print(f"Transformed SQL query: \n{sql_query}")
 
         results = db.run(sql_query)
         print(f"Got {len(results)} results before distance filtering")
-        filtered_results = filter_results_by_distance(
-            results, center_lat, center_lon, max_distance_km
-        )
+        if polygon:
+            filtered_results = filter_results_in_polygon(results, db, polygon)
+        elif nearest:
+            filtered_results = nearest_results(
+                results, db, center_lat, center_lon, nearest
+            )
+        else:
+            filtered_results = filter_within_radius(
+                results, center_lat, center_lon, max_distance_km
+            )
 
         print(f"Got {len(filtered_results)} results after distance filtering")
         return jsonify(filtered_results)
@@ -74,6 +90,81 @@ def get_projects():
         return jsonify({"error": f"An error occurred: {e}"}), 500
 
 
+def plan_query(user_query, db, prepared=None):
+    """
+    Run the slow part of a search: location extraction, geocoding and SQL
+    generation. When run speculatively, `prepared` is checked between steps so
+    superseded queries stop early.
+    """
+    extracted_info = extract_location_from_query(user_query)
+    location, query_without_location = (
+        extracted_info["location"],
+        extracted_info["query"],
+    )
+    if prepared:
+        prepared.check_cancelled()
+    coordinates = get_zonal_coordinates(location)
+    if prepared:
+        prepared.check_cancelled()
+    sql_query = transform_query(query_without_location, db)
+    return {"location": location, "coordinates": coordinates, "sql_query": sql_query}
+
+
+prepared_queries = PreparedQueryCache(
+    lambda user_query, prepared: plan_query(user_query, get_db_connection(), prepared)
+)
+
+
+def get_query_plan(user_query, db):
+    with prepared_queries.waiting(user_query) as prepared:
+        # A preparation still queued behind other work would only delay the search
+        if prepared and (prepared.future.running() or prepared.future.done()):
+            try:
+                plan = prepared.result(timeout=PREPARED_QUERY_WAIT)
+                print("Reusing prepared query plan")
+                return plan
+            except TimeoutError:
+                print("Prepared query is taking too long, planning again")
+            except Exception as e:
+                print(f"Prepared query failed, planning again: {e}")
+    return plan_query(user_query, db)
+
+
+@app.route("/api/projects/prepare", methods=["POST"])
+def prepare_projects_query():
+    """
+    Start planning a partial query in the background so a following
+    /api/projects call with the same query can reuse the work.
+    """
+    params = request.get_json(silent=True)
+    if not isinstance(params, dict):
+        return jsonify({"error": "Request body must be a JSON object"}), 400
+    user_query, client_id = params.get("query", ""), params.get("client_id")
+    if not isinstance(user_query, str):
+        return jsonify({"error": "query must be a string"}), 400
+    if client_id is not None and not isinstance(client_id, str):
+        return jsonify({"error": "client_id must be a string"}), 400
+    if len(user_query.strip()) < MIN_PREPARE_QUERY_LENGTH:
+        return jsonify({"status": "ignored"}), 202
+    prepared = prepared_queries.prepare(user_query, client_id)
+    status = "ready" if prepared.future.done() else "pending"
+    return jsonify({"status": status}), 202
+
+
+def nearest_results(results, db, center_lat, center_lon, k):
+    neighbours = get_spatial_index(db).nearest(
+        center_lat, center_lon, k, {int(result["id"]) for result in results}
+    )
+    nearest = filter_by_ids(results, [project_id for project_id, _ in neighbours])
+    for result, (_, distance_km) in zip(nearest, neighbours):
+        result["distance_km"] = round(distance_km, 3)
+    return nearest
+
+
+def filter_results_in_polygon(results, db, polygon):
+    return filter_by_ids(results, get_spatial_index(db).within_polygon(polygon))
+
+
 def get_zonal_coordinates(location):
     if location:
         print(f"Extracted location from user query: {location}")
@@ -84,21 +175,133 @@ def get_zonal_coordinates(location):
     return BLR_LAT, BLR_LON, BLR_RADIUS
 
 
+def not_modified(etag, last_modified):
+    if request.if_none_match:
+        return request.if_none_match.contains(etag)
+    return (
+        request.if_modified_since is not None
+        and last_modified <= request.if_modified_since
+    )
+
+
+def cacheable(response, etag, last_modified):
+    response.set_etag(etag)
+    response.last_modified = last_modified
+    # Let clients keep the body but revalidate it against the DB version
+    response.cache_control.no_cache = True
+    return response
+
+
 @app.route("/api/project/<int:project_id>", methods=["GET"])
 def get_project_details(project_id):
     db = get_db_connection()
+    version, last_modified = db.get_version()
     sql_query = f"""
-    SELECT project_name, promoter_name, rera_registration_number, 
-           source_of_water, approving_authority, project_start_date, proposed_completion_date
+    SELECT {PROJECT_DETAILS_COLUMNS}
     FROM karnataka_projects
-    WHERE project_id = {project_id}
+    WHERE project_id = ?
     """
-    results = db.run(sql_query)
-    if results:
-        return jsonify(results[0])
-    else:
+    results = db.run(sql_query, (project_id,))
+    # Look the project up first so unknown IDs get a 404, not a 304
+    if not results:
         return jsonify({"error": "Project not found"}), 404
 
+    etag = f"{version}-{project_id}"
+    if not_modified(etag, last_modified):
+        return cacheable(Response(status=304), etag, last_modified)
+    return cacheable(jsonify(results[0]), etag, last_modified)
+
+
+@app.route("/api/projects/details", methods=["GET"])
+def get_projects_details():
+    try:
+        project_ids = sorted(
+            {int(project_id) for project_id in request.args["ids"].split(",")}
+        )
+    except (KeyError, ValueError):
+        return jsonify({"error": "ids must be a comma separated list of integers"}), 400
+    if len(project_ids) > MAX_DETAILS_BATCH:
+        return (
+            jsonify({"error": f"At most {MAX_DETAILS_BATCH} ids can be requested"}),
+            400,
+        )
+
+    db = get_db_connection()
+    version, last_modified = db.get_version()
+    etag = f"{version}-{hashlib.sha1(str(project_ids).encode()).hexdigest()}"
+    if not_modified(etag, last_modified):
+        return cacheable(Response(status=304), etag, last_modified)
+
+    sql_query = f"""
+    SELECT project_id AS id, {PROJECT_DETAILS_COLUMNS}
+    FROM karnataka_projects
+    WHERE project_id IN ({", ".join("?" * len(project_ids))})
+    """
+    results = db.run(sql_query, project_ids)
+    details = {str(result.pop("id")): result for result in results}
+    return cacheable(jsonify(details), etag, last_modified)
+
+
+@app.route("/api/stats", methods=["GET"])
+def get_stats():
+    """
+    Project count, total land area and total cost per key of a dimension, read
+    from the project_summary table that is materialized when the DB is built.
+    Optional filters: `key` (exact, or a prefix for geohash cells), `promoter`
+    (substring, for the promoter and year dimensions) and `limit`. Queries scan
+    the summary rows of one dimension, never the projects table; a `promoter`
+    substring filter is a LIKE scan plus GROUP BY over those rows.
+    """
+    dimension = request.args.get("dimension")
+    if dimension not in STATS_DIMENSIONS:
+        return (
+            jsonify({"error": f"dimension must be one of {', '.join(STATS_DIMENSIONS)}"}),
+            400,
+        )
+    key = request.args.get("key")
+    promoter = request.args.get("promoter")
+    # SQLite treats a negative LIMIT as no limit at all
+    limit = max(1, min(request.args.get("limit", default=100, type=int), MAX_STATS_ROWS))
+
+    db = get_db_connection()
+    version, last_modified = db.get_version()
+    etag = f"{version}-{hashlib.sha1(request.query_string).hexdigest()}"
+    if not_modified(etag, last_modified):
+        return cacheable(Response(status=304), etag, last_modified)
+
+    key_column, conditions, params = "key", ["dimension = ?"], [dimension]
+    if promoter and dimension == "year":
+        # Per-year totals for one promoter come from the promoter_year keys
+        key_column = "substr(key, -4)"
+        params = ["promoter_year"]
+        conditions.append("key LIKE ?")
+        params.append(f"%{promoter.upper()}%|%")
+    elif promoter and dimension == "promoter":
+        conditions.append("key LIKE ?")
+        params.append(f"%{promoter.upper()}%")
+    if key and dimension == "geohash":
+        conditions.append("key LIKE ?")
+        params.append(f"{key.lower()}%")
+    elif key:
+        conditions.append(f"{key_column} = ?")
+        # Keys are stored upper case, except years and geohash cells
+        params.append(key.upper() if dimension in ("promoter", "taluk", "status") else key)
+
+    sql_query = f"""
+    SELECT {key_column} AS key, SUM(project_count) AS project_count,
+           SUM(total_area) AS total_area, SUM(total_cost) AS total_cost
+    FROM project_summary
+    WHERE {" AND ".join(conditions)}
+    GROUP BY 1
+    ORDER BY project_count DESC, key
+    LIMIT ?
+    """
+    try:
+        results = db.run(sql_query, params + [limit])
+    except Exception as e:
+        return jsonify({"error": f"An error occurred: {e}"}), 500
+    return cacheable(jsonify(results), etag, last_modified)
+
 
 @app.route("/api/geocode", methods=["POST"])
 def geocode():
@@ -0,0 +1,167 @@
+"""
+Crawl a fault-injecting mock portal with the real scraper client and report how
+the adaptive rate control and circuit breaker cope.
+
+    python benchmarks/fault_injection.py --projects 300
+
+For every scenario the crawl must not report an existing project as
+nonexistent; transient failures end up in the failed project IDs file for a
+later retry. fetch_new_data also has to find the end of the ID range on a flaky
+portal. Exits with status 1 if any scenario fails either check.
+"""
+
+import os
+import sys
+import csv
+import time
+import logging
+import argparse
+import tempfile
+import threading
+
+import fixtures  # noqa: F401, puts extract_data on sys.path
+import extract
+from rate_control import AdaptiveConcurrency, CircuitBreaker, RateController
+from mock_portal import FaultConfig, MockPortal
+
+# Every tenth project ID does not exist on the portal
+MISSING_EVERY = 10
+# fetch_new_data crawls one project at a time, so it gets a shorter range, and
+# has to stop by itself after the last project
+NEW_DATA_PROJECTS = 50
+NEW_DATA_TIMEOUT = 120.0
+
+PROJECT_PAGE_TEMPLATE = """<html><body>
+<span class="pull-right user_name">Project Name :<b>Project {project_id}</b></span>
+<span class="pull-right user_name">Registration Number :<b>PRM/KA/RERA/1251/446/PR/171010/{project_id:06d}</b></span>
+</body></html>"""
+
+# Scenario -> faults and whether the IDs are crawled with run_concurrently, like
+# update_existing_data, or found by fetch_new_data, which has to detect the end
+SCENARIOS = {
+    "healthy": (FaultConfig(latency=0.02), "known_ids"),
+    "flaky": (FaultConfig(latency=0.02, error_rate=0.05, reset_rate=0.02), "known_ids"),
+    "overloaded": (FaultConfig(latency=0.05, capacity=4), "known_ids"),
+    "truncating": (
+        FaultConfig(latency=0.05, capacity=4, truncate_when_overloaded=True),
+        "known_ids",
+    ),
+    "outage": (FaultConfig(latency=0.02, outage_start=1.0, outage_duration=3.0), "known_ids"),
+    "end_of_range": (FaultConfig(latency=0.02, error_rate=0.3), "new_data"),
+}
+
+
+def project_page(project_id: int, last_project_id: int):
+    if project_id > last_project_id or project_id % MISSING_EVERY == 0:
+        return None
+    return PROJECT_PAGE_TEMPLATE.format(project_id=project_id)
+
+
+def crawl_known_ids(parser, project_ids, workdir):
+    extract.run_concurrently(
+        project_ids, os.path.join(workdir, "projects.csv"), parser=parser
+    )
+    return True
+
+
+def crawl_new_data(parser, project_ids, workdir):
+    """Start after project 0 and let fetch_new_data find the end of the range."""
+    filename = os.path.join(workdir, "projects.csv")
+    with open(filename, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=extract.PROJECT_FIELDS)
+        writer.writeheader()
+        writer.writerow({"project_id": 0})
+    crawl = threading.Thread(
+        target=extract.fetch_new_data,
+        args=(filename, parser, os.path.join(workdir, "projects.db")),
+        daemon=True,
+    )
+    crawl.start()
+    crawl.join(NEW_DATA_TIMEOUT)
+    return not crawl.is_alive()
+
+
+CRAWLS = {"known_ids": crawl_known_ids, "new_data": crawl_new_data}
+
+
+def read_ids(filename: str, column=None):
+    if not os.path.exists(filename):
+        return set()
+    with open(filename, newline="", encoding="utf-8") as f:
+        if column is None:
+            return {int(line) for line in f}
+        return {int(row[column]) for row in csv.DictReader(f)} - {0}
+
+
+def run_scenario(faults: FaultConfig, crawl: str, project_ids, workdir: str):
+    rate_control = RateController(
+        AdaptiveConcurrency(latency_target=0.5),
+        CircuitBreaker(failure_threshold=5, reset_timeout=1.0, max_reset_timeout=4.0),
+    )
+    extract.failed_project_ids.clear()
+    extract.FAILED_PROJECT_IDS_FILE = os.path.join(workdir, "failed_project_ids.txt")
+    extract.STATUS_CHECKS_FILE = os.path.join(workdir, "status_checks.csv")
+    last_project_id = project_ids[-1]
+
+    with MockPortal(
+        lambda project_id: project_page(project_id, last_project_id), faults=faults
+    ) as portal:
+        parser = extract.ReraDataParser(rate_control)
+        parser.BASE_URL = portal.base_url
+        start = time.perf_counter()
+        finished = CRAWLS[crawl](parser, project_ids, workdir)
+        elapsed = time.perf_counter() - start
+        requests_served = portal.requests_served
+
+    # What a later retry_failed_projects run would read back
+    processed = read_ids(os.path.join(workdir, "projects.csv"), "project_id")
+    failed = read_ids(extract.FAILED_PROJECT_IDS_FILE)
+    existing = {
+        project_id
+        for project_id in project_ids
+        if project_page(project_id, last_project_id)
+    }
+    return {
+        "finished": finished,
+        "elapsed": elapsed,
+        "requests": requests_served,
+        "processed": len(processed),
+        "failed": len(failed),
+        "false_missing": len(existing - processed - failed),
+        "limit": rate_control.concurrency.limit,
+        "breaker_opens": rate_control.breaker.times_opened,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--projects", type=int, default=300)
+    parser.add_argument("--scenario", choices=SCENARIOS, action="append")
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    project_ids = list(range(1, args.projects + 1))
+
+    columns = ["finished", "elapsed", "requests", "processed", "failed", "false_missing", "limit", "breaker_opens"]
+    print(f"{'scenario':<14}" + "".join(f"{column:>15}" for column in columns))
+    misreported = []
+    for name in args.scenario or SCENARIOS:
+        faults, crawl = SCENARIOS[name]
+        ids = project_ids if crawl == "known_ids" else project_ids[:NEW_DATA_PROJECTS]
+        with tempfile.TemporaryDirectory() as workdir:
+            result = run_scenario(faults, crawl, ids, workdir)
+        result["elapsed"] = f"{result['elapsed']:.2f}s"
+        print(f"{name:<14}" + "".join(f"{str(result[column]):>15}" for column in columns))
+        if result["false_missing"] or not result["finished"]:
+            misreported.append(name)
+
+    if misreported:
+        print(
+            "Existing projects reported as nonexistent, or the crawl did not stop, in: "
+            + ", ".join(misreported)
+        )
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+Shared helpers for the benchmarks: a projects DB built from the scraped CSV and
+offline stand-ins for the Gemini and HERE backends.
+"""
+
+import os
+import re
+import csv
+import sys
+import sqlite3
+import functools
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(BENCHMARKS_DIR)
+EXTRACT_DATA_DIR = os.path.join(BACKEND_DIR, "extract_data")
+CSV_FILE = os.path.join(EXTRACT_DATA_DIR, "karnataka_projects.csv")
+
+for path in (BACKEND_DIR, EXTRACT_DATA_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+# Offsets scaled copies of the dataset so project IDs stay unique
+SCALE_ID_OFFSET = 1_000_000
+
+LOCALITIES = {
+    "whitefield": (12.9698, 77.7500),
+    "electronic city": (12.8452, 77.6602),
+    "varthur": (12.9406, 77.7470),
+    "marathahalli": (12.9569, 77.7011),
+    "hebbal": (13.0358, 77.5970),
+    "sarjapur": (12.8600, 77.7864),
+    "yelahanka": (13.1007, 77.5963),
+    "bangalore": (12.9716, 77.5946),
+}
+
+
+def write_scaled_csv(filename: str, scale: int, limit=None):
+    """
+    Write karnataka_projects.csv repeated `scale` times, keeping it sorted by
+    project ID, optionally stopping after `limit` rows. Returns the field names.
+    """
+    with open(CSV_FILE, newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        fieldnames = reader.fieldnames
+        rows = list(reader)
+    with open(filename, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer.writeheader()
+        written = 0
+        for i in range(scale):
+            for row in rows:
+                if limit is not None and written >= limit:
+                    return fieldnames
+                writer.writerow(
+                    {**row, "project_id": int(row["project_id"]) + i * SCALE_ID_OFFSET}
+                )
+                written += 1
+    return fieldnames
+
+
+def peak_rss_mb() -> float:
+    """
+    High-water RSS of this process. Unlike getrusage, /proc does not carry over
+    the peak of the benchmark process that spawned the child.
+    """
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    raise RuntimeError("VmHWM not available")
+
+
+def build_projects_db(db_path: str, scale: int = 1):
+    """
+    Build the projects table from karnataka_projects.csv, repeated `scale` times.
+    Coordinates that are not plain decimal degrees are dropped, as the app expects.
+    """
+    import pandas as pd
+    from sinks import TABLE_NAME, read_projects
+
+    df = read_projects(CSV_FILE)
+    for column in ("latitude", "longitude"):
+        df[column] = pd.to_numeric(df[column], errors="coerce")
+    if scale > 1:
+        copies = []
+        for i in range(scale):
+            copy = df.copy()
+            copy["project_id"] += i * SCALE_ID_OFFSET
+            copies.append(copy)
+        df = pd.concat(copies, ignore_index=True)
+
+    with sqlite3.connect(db_path) as conn:
+        df.to_sql(TABLE_NAME, conn, if_exists="replace", index=False)
+    return len(df)
+
+
+def split_location(query: str):
+    match = re.search(r"\b(?:in|near|around)\s+(.+)$", query, re.IGNORECASE)
+    if not match:
+        return None, query
+    return match.group(1).strip(), query[: match.start()].strip()
+
+
+def fake_sql(question: str) -> str:
+    filters = [
+        "land_under_litigation = 'NO'",
+        "rera_approval_status = 'APPROVED'",
+        "project_name IS NOT NULL",
+        "latitude IS NOT NULL",
+        "longitude IS NOT NULL",
+    ]
+    promoter = re.search(r"\bby\s+(\w+)", question, re.IGNORECASE)
+    if promoter:
+        filters.append(f"UPPER(promoter_name) LIKE '%{promoter.group(1).upper()}%'")
+    year = re.search(r"\b(?:in|after)\s+(20\d\d)\b", question)
+    if year:
+        filters.append(f"CAST(substr(project_start_date, 1, 4) AS INTEGER) >= {year.group(1)}")
+    return (
+        "SELECT project_id AS id, project_name AS name, latitude, longitude "
+        f"FROM karnataka_projects WHERE {' AND '.join(filters)}"
+    )
+
+
+def fake_llm_response(prompt):
+    """Answer the extraction and SQL prompts the way Gemini would, without a network call."""
+    import json
+    from langchain_core.messages import AIMessage
+
+    text = prompt.to_string()
+    extraction = re.search(r"Input: (.*)\n\s*\n\s*Output format", text)
+    if extraction:
+        location, query = split_location(extraction.group(1).strip())
+        return AIMessage(content=json.dumps({"location": location, "query": query}))
+    question = re.search(r"Question: (.*)$", text, re.DOTALL).group(1).strip()
+    return AIMessage(content=fake_sql(question))
+
+
+def fake_geocode(location: str):
+    return LOCALITIES.get(location.lower())
+
+
+def install_stub_backends():
+    """
+    Point the app at the offline LLM and geocoder. The Gemini client module is
+    still imported so first-request timings include that cost.
+    """
+    import app
+    import query_transformer
+    from langchain_core.runnables import RunnableLambda
+
+    @functools.lru_cache(maxsize=None)
+    def stub_llm():
+        import langchain_google_genai  # noqa: F401
+
+        return RunnableLambda(fake_llm_response)
+
+    query_transformer.get_llm = stub_llm
+    app.geocode_location = fake_geocode
+
+
+def use_projects_db(db_path: str):
+    import database
+
+    database.PROJECTS_DB_PATH = db_path
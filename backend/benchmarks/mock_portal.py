@@ -0,0 +1,194 @@
+"""
+Local stand-in for the Karnataka RERA portal with configurable fault injection.
+
+Serves projectDetails / projectViewDetails pages from callables and can add
+latency, 5xx responses, connection resets, overload beyond a fixed capacity
+and full outages. Unknown project IDs get a truncated chunked response, which
+is how the real portal answers them. An overloaded portal can be set to cut off
+responses the same way instead of returning 503s.
+"""
+
+import time
+import random
+import threading
+from dataclasses import dataclass
+from typing import Callable, Optional
+from urllib.parse import parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+@dataclass
+class FaultConfig:
+    # Base response time in seconds
+    latency: float = 0.0
+    # Share of requests answered with a 500
+    error_rate: float = 0.0
+    # Share of requests where the connection is dropped without a response
+    reset_rate: float = 0.0
+    # Concurrent requests served before the portal slows down and starts returning 503s
+    capacity: Optional[int] = None
+    # Shed requests past capacity with a truncated response instead of a 503
+    truncate_when_overloaded: bool = False
+    # Seconds after start when the portal goes down, and for how long
+    outage_start: Optional[float] = None
+    outage_duration: float = 0.0
+
+
+VIEW_DETAILS_TEMPLATE = """<html><body>
+<table id="approvedTable">
+<thead><tr><th>Registration Number</th><th>Status</th></tr></thead>
+<tbody><tr><td>{reg_no}</td><td>{status}</td></tr></tbody>
+</table>
+</body></html>"""
+
+
+class MockPortal:
+    def __init__(
+        self,
+        project_page: Callable[[int], Optional[str]],
+        approval_status: Callable[[str], Optional[str]] = lambda reg_no: "APPROVED",
+        faults: Optional[FaultConfig] = None,
+        seed: int = 0,
+    ):
+        self.project_page = project_page
+        self.approval_status = approval_status
+        self.faults = faults or FaultConfig()
+        self.requests_served = 0
+        self._random = random.Random(seed)
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._started_at = 0.0
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def start(self) -> str:
+        self._started_at = time.monotonic()
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self.base_url
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _in_outage(self) -> bool:
+        if self.faults.outage_start is None:
+            return False
+        elapsed = time.monotonic() - self._started_at
+        return (
+            self.faults.outage_start
+            <= elapsed
+            < self.faults.outage_start + self.faults.outage_duration
+        )
+
+    def _pick_fault(self, in_flight: int) -> Optional[str]:
+        """Return the fault to inject for this request, if any."""
+        faults = self.faults
+        if self._in_outage():
+            return "outage"
+        with self._lock:
+            roll = self._random.random()
+        if roll < faults.reset_rate:
+            return "reset"
+        if roll < faults.reset_rate + faults.error_rate:
+            return "error"
+        if faults.capacity is not None and in_flight > faults.capacity:
+            # The further past capacity, the more requests are shed
+            with self._lock:
+                shed = self._random.random() < 1 - faults.capacity / in_flight
+            if shed:
+                return "overload"
+        return None
+
+    def _delay(self, in_flight: int) -> float:
+        delay = self.faults.latency
+        if self.faults.capacity is not None and in_flight > self.faults.capacity:
+            delay *= in_flight / self.faults.capacity
+        return delay
+
+    def _handler_class(self):
+        portal = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                self._send(200, "<html></html>", {"Set-Cookie": "JSESSIONID=mock; Path=/"})
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                form = parse_qs(self.rfile.read(length).decode())
+                with portal._lock:
+                    portal._in_flight += 1
+                    portal.requests_served += 1
+                    in_flight = portal._in_flight
+                try:
+                    self._handle_post(form, in_flight)
+                finally:
+                    with portal._lock:
+                        portal._in_flight -= 1
+
+            def _handle_post(self, form, in_flight):
+                fault = portal._pick_fault(in_flight)
+                time.sleep(portal._delay(in_flight))
+                if fault == "reset":
+                    self.close_connection = True
+                    self.connection.close()
+                    return
+                if fault == "overload" and portal.faults.truncate_when_overloaded:
+                    return self._send_truncated()
+                if fault in ("outage", "overload"):
+                    return self._send(503, "Service Unavailable")
+                if fault == "error":
+                    return self._send(500, "Internal Server Error")
+
+                if self.path == "/projectDetails":
+                    page = portal.project_page(int(form["action"][0]))
+                    if page is None:
+                        return self._send_truncated()
+                    return self._send(200, page)
+                if self.path == "/projectViewDetails":
+                    reg_no = form.get("regNo", [""])[0]
+                    status = portal.approval_status(reg_no)
+                    if status is None:
+                        return self._send(200, "<html><body></body></html>")
+                    page = VIEW_DETAILS_TEMPLATE.format(reg_no=reg_no, status=status)
+                    return self._send(200, page)
+                self._send(404, "Not Found")
+
+            def _send(self, status, body, headers=None):
+                payload = body.encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(payload)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def _send_truncated(self):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                self.wfile.write(b"10\r\n<html><body>")
+                self.close_connection = True
+                self.connection.close()
+
+        return Handler
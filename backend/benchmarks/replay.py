@@ -0,0 +1,230 @@
+"""
+Offline replay benchmark for the scrape -> build -> query pipeline.
+
+1. scrape: synthetic projectDetails/projectViewDetails pages rendered from
+   karnataka_projects.csv are served by a local mock portal and crawled into a
+   CSV with the real scraper (ReraDataParser + run_concurrently).
+2. build: the scraped output is loaded into SQLite with csv_to_sqlite.
+3. query: query_log.txt is replayed against /api/projects, served from the
+   built DB, with the Gemini and HERE backends stubbed out.
+
+Each phase runs in its own process so peak RSS is reported per phase. Without
+the scrape phase, the build reads the CSV rows the corpus would be rendered
+from instead, which skips the scrape at 100k rows (about 13 minutes).
+
+    python benchmarks/replay.py --rows 10000
+    python benchmarks/replay.py --rows 100000 --phase build --phase query
+    python benchmarks/replay.py --rows 10000 --save-baseline
+
+Results are compared against benchmarks/baselines/replay_<rows>.json.
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+from fixtures import BACKEND_DIR, BENCHMARKS_DIR, peak_rss_mb, write_scaled_csv
+
+PHASES = ["scrape", "build", "query"]
+QUERY_LOG = os.path.join(BENCHMARKS_DIR, "query_log.txt")
+BASELINES_DIR = os.path.join(BENCHMARKS_DIR, "baselines")
+# Relative change tolerated before a metric is reported as a regression
+TOLERANCE = 0.25
+# Metrics where a higher value is better, all others are better when lower
+HIGHER_IS_BETTER = {"scrape.pages_per_sec", "scrape.projects_per_sec", "query.requests_per_sec"}
+
+
+def percentile(values, pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1)
+    return ordered[max(index, 0)]
+
+
+def scraped_file(workdir: str) -> str:
+    # Always the canonical CSV, so runs with and without pyarrow stay comparable
+    return os.path.join(workdir, "projects.csv")
+
+
+def build_source(workdir: str) -> str:
+    """The scraped output if the scrape phase ran, otherwise the unscraped CSV rows."""
+    scraped = scraped_file(workdir)
+    return scraped if os.path.exists(scraped) else os.path.join(workdir, "source.csv")
+
+
+def built_db(workdir: str) -> str:
+    return os.path.join(workdir, "built.db")
+
+
+def run_scrape(rows: int, workdir: str):
+    import logging
+
+    import extract
+    from mock_portal import MockPortal
+    from synthetic_pages import SyntheticCorpus
+
+    logging.disable(logging.CRITICAL)
+    corpus = SyntheticCorpus(copies=math.ceil(rows / 10_000))
+    project_ids = corpus.project_ids[:rows]
+
+    with MockPortal(corpus.project_page, corpus.approval_status) as portal:
+        extract.ReraDataParser.BASE_URL = portal.base_url
+        start = time.perf_counter()
+        extract.run_concurrently(project_ids, scraped_file(workdir))
+        elapsed = time.perf_counter() - start
+        pages = portal.requests_served
+
+    return {
+        "seconds": elapsed,
+        "pages": pages,
+        "pages_per_sec": pages / elapsed,
+        "projects_per_sec": len(project_ids) / elapsed,
+    }
+
+
+def run_build(rows: int, workdir: str):
+    import logging
+
+    import extract
+
+    logging.disable(logging.CRITICAL)
+    source = build_source(workdir)
+    if not os.path.exists(source):
+        raise SystemExit(f"{source} not found, run the scrape phase first")
+
+    start = time.perf_counter()
+    extract.csv_to_sqlite(source, built_db(workdir))
+    return {"seconds": time.perf_counter() - start}
+
+
+def run_query(rows: int, workdir: str, repeats: int = 5):
+    import app
+    from fixtures import install_stub_backends, use_projects_db
+
+    # The pipeline's real output, coordinates that are not decimal degrees included
+    db_path = built_db(workdir)
+    if not os.path.exists(db_path):
+        raise SystemExit(f"{db_path} not found, run the build phase first")
+    install_stub_backends()
+    use_projects_db(db_path)
+
+    with open(QUERY_LOG) as f:
+        queries = [line.strip() for line in f if line.strip()]
+
+    client = app.app.test_client()
+    # Warm up once so lazy imports are not counted against request latency
+    client.post("/api/projects", json={"query": queries[0]})
+
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for query in queries:
+            request_start = time.perf_counter()
+            response = client.post("/api/projects", json={"query": query})
+            latencies.append(time.perf_counter() - request_start)
+            assert response.status_code == 200, response.get_json()
+    elapsed = time.perf_counter() - start
+
+    return {
+        "requests": len(latencies),
+        "requests_per_sec": len(latencies) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+
+PHASE_RUNNERS = {"scrape": run_scrape, "build": run_build, "query": run_query}
+
+
+def run_phase(phase: str, rows: int, workdir: str):
+    env = {**os.environ, "GOOGLE_API_KEY": "benchmark"}
+    command = [sys.executable, os.path.abspath(__file__), "--child", phase]
+    output = subprocess.run(
+        command + ["--rows", str(rows), "--workdir", workdir],
+        cwd=workdir,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if output.returncode != 0:
+        raise SystemExit(f"Phase {phase} failed:\n{output.stderr}")
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def compare(results, baseline):
+    regressions = []
+    print(f"{'metric':<28}{'current':>12}{'baseline':>12}{'change':>10}")
+    for name, value in results.items():
+        base = baseline.get(name)
+        if base is None or base == 0:
+            print(f"{name:<28}{value:>12.2f}{'-':>12}{'-':>10}")
+            continue
+        change = (value - base) / base
+        worse = -change if name in HIGHER_IS_BETTER else change
+        flag = "  REGRESSION" if worse > TOLERANCE and name != "scrape.pages" else ""
+        if flag:
+            regressions.append(name)
+        print(f"{name:<28}{value:>12.2f}{base:>12.2f}{change:>+10.0%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--phase", choices=PHASES, action="append")
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    parser.add_argument("--workdir", help="Keep intermediate files in this directory")
+    parser.add_argument("--child", choices=PHASES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        sys.path.insert(0, BACKEND_DIR)
+        result = PHASE_RUNNERS[args.child](args.rows, args.workdir)
+        result["peak_rss_mb"] = peak_rss_mb()
+        print(json.dumps(result))
+        return
+
+    phases = args.phase or PHASES
+    with tempfile.TemporaryDirectory() as tmpdir:
+        workdir = os.path.abspath(args.workdir or tmpdir)
+        os.makedirs(workdir, exist_ok=True)
+        if "query" in phases and "build" not in phases and not os.path.exists(
+            built_db(workdir)
+        ):
+            # Queries are served from the DB the build phase produces
+            phases = [phase for phase in PHASES if phase in phases or phase == "build"]
+        if "build" in phases and "scrape" not in phases:
+            write_scaled_csv(
+                os.path.join(workdir, "source.csv"),
+                math.ceil(args.rows / 10_000),
+                limit=args.rows,
+            )
+        results = {}
+        for phase in phases:
+            for name, value in run_phase(phase, args.rows, workdir).items():
+                results[f"{phase}.{name}"] = value
+
+    baseline_file = os.path.join(BASELINES_DIR, f"replay_{args.rows}.json")
+    baseline = {}
+    if os.path.exists(baseline_file):
+        with open(baseline_file) as f:
+            baseline = json.load(f)
+    regressions = compare(results, baseline)
+
+    if args.save_baseline:
+        os.makedirs(BASELINES_DIR, exist_ok=True)
+        with open(baseline_file, "w") as f:
+            json.dump({**baseline, **results}, f, indent=2, sort_keys=True)
+        print(f"Saved baseline to {baseline_file}")
+    if regressions and args.fail_on_regression:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
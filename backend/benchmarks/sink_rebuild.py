@@ -0,0 +1,76 @@
+"""
+End-to-end rebuild benchmark for the scraper output sinks.
+
+Writes every row of karnataka_projects.csv through each sink, loads the
+result back with `read_projects` and rebuilds the SQLite table from it.
+
+    python benchmarks/sink_rebuild.py --scale 10
+"""
+
+import os
+import csv
+import time
+import sqlite3
+import argparse
+import tempfile
+
+from fixtures import CSV_FILE, SCALE_ID_OFFSET
+from sinks import PARQUET_AVAILABLE, TABLE_NAME, open_sink, read_projects
+
+
+def load_rows(scale: int):
+    with open(CSV_FILE, newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        fieldnames = reader.fieldnames
+        rows = list(reader)
+
+    scaled_rows = []
+    for i in range(scale):
+        offset = i * SCALE_ID_OFFSET
+        for row in rows:
+            scaled_rows.append({**row, "project_id": int(row["project_id"]) + offset})
+    return fieldnames, scaled_rows
+
+
+def bench_sink(extension: str, fieldnames, rows, workdir: str):
+    output = os.path.join(workdir, f"projects{extension}")
+    db_file = os.path.join(workdir, f"rebuild{extension}.db")
+
+    start = time.perf_counter()
+    with open_sink(output, fieldnames) as sink:
+        for row in rows:
+            sink.write(row)
+    write_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    df = read_projects(output)
+    with sqlite3.connect(db_file) as conn:
+        df.to_sql(TABLE_NAME, conn, if_exists="replace", index=False)
+    rebuild_time = time.perf_counter() - start
+
+    return write_time, rebuild_time, os.path.getsize(output)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scale", type=int, default=1, help="Dataset multiplier")
+    args = parser.parse_args()
+
+    fieldnames, rows = load_rows(args.scale)
+    extensions = [".csv", ".db"] + ([".parquet"] if PARQUET_AVAILABLE else [])
+
+    print(f"{len(rows)} rows")
+    print(f"{'sink':<10}{'write (s)':>12}{'rebuild (s)':>14}{'total (s)':>12}{'size (MB)':>12}")
+    with tempfile.TemporaryDirectory() as workdir:
+        for extension in extensions:
+            write_time, rebuild_time, size = bench_sink(
+                extension, fieldnames, rows, workdir
+            )
+            print(
+                f"{extension:<10}{write_time:>12.3f}{rebuild_time:>14.3f}"
+                f"{write_time + rebuild_time:>12.3f}{size / 1e6:>12.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""
+Latency of the spatial search modes of /api/projects against a Python scan of
+the SQL results with haversine_distance, the way the circle filter worked
+before the spatial index. Every mode is timed on all projects and on a
+promoter's projects, the typical size of a filtered search.
+
+    python benchmarks/spatial.py --scale 1 --scale 10
+"""
+
+import os
+import math
+import time
+import argparse
+import tempfile
+
+from fixtures import LOCALITIES, build_projects_db
+
+import app
+from database import SQLiteDatabase
+from spatial_index import filter_by_ids, filter_within_radius, get_spatial_index
+
+PROJECTS_SQL = """
+SELECT project_id AS id, project_name AS name, latitude, longitude
+FROM karnataka_projects
+WHERE latitude IS NOT NULL AND longitude IS NOT NULL
+"""
+# Result sets the modes are timed on, e.g. "the 20 closest Prestige projects"
+SEARCHES = {
+    "all": PROJECTS_SQL,
+    "prestige": PROJECTS_SQL + "AND UPPER(promoter_name) LIKE '%PRESTIGE%'",
+}
+
+# Rough outline of the Outer Ring Road corridor between Hebbal and Silk Board
+CORRIDOR = [
+    (13.0358, 77.5970),
+    (13.0450, 77.6300),
+    (12.9900, 77.7000),
+    (12.9200, 77.6800),
+    (12.9170, 77.6230),
+    (12.9400, 77.6100),
+    (12.9950, 77.6700),
+    (13.0250, 77.6050),
+]
+NEAREST = 20
+
+
+def haversine_distance(lat1, lon1, lat2, lon2):
+    R = 6371  # Earth radius in kilometers
+
+    lat1, lon1, lat2, lon2 = map(math.radians, [lat1, lon1, lat2, lon2])
+
+    dlat = lat2 - lat1
+    dlon = lon2 - lon1
+
+    a = (
+        math.sin(dlat / 2) ** 2
+        + math.cos(lat1) * math.cos(lat2) * math.sin(dlon / 2) ** 2
+    )
+    c = 2 * math.asin(math.sqrt(a))
+
+    return R * c
+
+
+def scan_circle(results, center_lat, center_lon, max_distance_km):
+    return [
+        result
+        for result in results
+        if haversine_distance(
+            center_lat,
+            center_lon,
+            float(result["latitude"]),
+            float(result["longitude"]),
+        )
+        <= max_distance_km
+    ]
+
+
+def timed(func, repeats):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        result = func()
+    return (time.perf_counter() - start) / repeats * 1000, result
+
+
+def point_in_polygon(lat, lon, polygon):
+    inside = False
+    for (lat1, lon1), (lat2, lon2) in zip(polygon, polygon[1:] + polygon[:1]):
+        if (lat1 > lat) != (lat2 > lat):
+            if lon < lon1 + (lat - lat1) * (lon2 - lon1) / (lat2 - lat1):
+                inside = not inside
+    return inside
+
+
+def scan_nearest(results, lat, lon, k):
+    distances = sorted(
+        (
+            haversine_distance(lat, lon, float(r["latitude"]), float(r["longitude"])),
+            r["id"],
+        )
+        for r in results
+    )
+    return [project_id for _, project_id in distances[:k]]
+
+
+def scan_polygon(results, polygon):
+    return [
+        r["id"]
+        for r in results
+        if point_in_polygon(float(r["latitude"]), float(r["longitude"]), polygon)
+    ]
+
+
+def bench(scale: int, repeats: int):
+    with tempfile.TemporaryDirectory() as workdir:
+        db = SQLiteDatabase(os.path.join(workdir, "rera_projects.db"))
+        build_projects_db(db.db_path, scale)
+
+        # The index the app caches per DB version, shared by nearest and polygon
+        build_ms, index = timed(lambda: get_spatial_index(db), 1)
+        # Built on the first nearest search over most of the index
+        tree_ms, _ = timed(lambda: index.tree, 1)
+        lat, lon = LOCALITIES["whitefield"]
+        print(
+            f"\n{len(index)} projects indexed, index build {build_ms:.1f} ms, "
+            f"ball tree {tree_ms:.1f} ms"
+        )
+        print(
+            f"{'search':<10}{'results':>9}{'mode':>14}{'full scan (ms)':>16}"
+            f"{'app (ms)':>12}{'matches':>10}"
+        )
+
+        for search, sql in SEARCHES.items():
+            results = db.run(sql)
+            candidates = {int(r["id"]) for r in results}
+            cases = [
+                (
+                    f"circle {app.ZONAL_RADIUS}km",
+                    lambda: scan_circle(results, lat, lon, app.ZONAL_RADIUS),
+                    lambda: filter_within_radius(results, lat, lon, app.ZONAL_RADIUS),
+                ),
+                (
+                    f"nearest {NEAREST}",
+                    lambda: scan_nearest(results, lat, lon, NEAREST),
+                    lambda: index.nearest(lat, lon, NEAREST, candidates),
+                ),
+                (
+                    "polygon",
+                    lambda: scan_polygon(results, CORRIDOR),
+                    lambda: filter_by_ids(results, index.within_polygon(CORRIDOR)),
+                ),
+            ]
+            for name, scan, indexed in cases:
+                scan_ms, scan_result = timed(scan, repeats)
+                app_ms, app_result = timed(indexed, repeats)
+                assert len(scan_result) == len(app_result), name
+                print(
+                    f"{search:<10}{len(results):>9}{name:>14}{scan_ms:>16.2f}"
+                    f"{app_ms:>12.2f}{len(app_result):>10}"
+                )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scale", type=int, action="append")
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    for scale in args.scale or [1, 10]:
+        bench(scale, args.repeats)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Worker cold start benchmark: time to import app.py and latency of the first and
+second /api/projects requests in a fresh process, with the Gemini and HERE
+backends stubbed out so it runs offline.
+
+    python benchmarks/startup.py --runs 5 --max-import 0.5 --max-first-request 3
+
+Exits with status 1 when a median exceeds its budget, so it can gate CI.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+from fixtures import BACKEND_DIR, build_projects_db
+
+QUERIES = [
+    "projects launched by prestige after 2022 near Whitefield",
+    "projects by sobha in Electronic City",
+]
+
+
+def measure_child(db_path: str):
+    """Runs in a fresh interpreter and prints the timings as JSON."""
+    start = time.perf_counter()
+    import app
+
+    import_time = time.perf_counter() - start
+
+    from fixtures import install_stub_backends, use_projects_db
+
+    install_stub_backends()
+    use_projects_db(db_path)
+    client = app.app.test_client()
+
+    timings = {"import": import_time}
+    for name, query in zip(("first_request", "second_request"), QUERIES):
+        start = time.perf_counter()
+        response = client.post("/api/projects", json={"query": query})
+        timings[name] = time.perf_counter() - start
+        assert response.status_code == 200, response.get_json()
+    print(json.dumps(timings))
+
+
+def run_child(db_path: str):
+    env = {**os.environ, "GOOGLE_API_KEY": "benchmark", "PYTHONPATH": BACKEND_DIR}
+    output = subprocess.run(
+        [sys.executable, __file__, "--child", db_path],
+        cwd=BACKEND_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-import", type=float, help="Budget in seconds")
+    parser.add_argument("--max-first-request", type=float, help="Budget in seconds")
+    parser.add_argument("--output", help="Write the medians to this JSON file")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        return measure_child(args.child)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        db_path = os.path.join(workdir, "rera_projects.db")
+        build_projects_db(db_path)
+        runs = [run_child(db_path) for _ in range(args.runs)]
+
+    medians = {name: statistics.median(run[name] for run in runs) for name in runs[0]}
+    for name, value in medians.items():
+        print(f"{name:<16}{value * 1000:>10.1f} ms")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(medians, f, indent=2)
+
+    over_budget = [
+        name
+        for name, budget in (
+            ("import", args.max_import),
+            ("first_request", args.max_first_request),
+        )
+        if budget is not None and medians[name] > budget
+    ]
+    if over_budget:
+        print(f"Over budget: {', '.join(over_budget)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Synthetic RERA portal pages rendered from karnataka_projects.csv rows.
+
+The markup only reproduces the structures ReraDataParser looks for, so a page
+parsed by the scraper yields the row it was rendered from.
+"""
+
+import csv
+from datetime import datetime
+from html import escape
+from typing import Dict, Optional
+
+from fixtures import CSV_FILE, SCALE_ID_OFFSET
+
+HEADER_FIELDS = [
+    ("Project Name", "project_name"),
+    ("Registration Number", "rera_registration_number"),
+]
+
+DETAIL_FIELDS = [
+    ("Promoter Name", "promoter_name"),
+    ("Project Type", "project_type"),
+    ("Project Sub Type", "project_subtype"),
+    ("Acknowledgement Number", "rera_acknowledgement_number"),
+    ("Is there any Litigations on Land/Property/Khatha", "land_under_litigation"),
+    ("District", "district"),
+    ("Taluk", "taluk"),
+    ("Latitude", "latitude"),
+    ("Longitude", "longitude"),
+    ("Source of Water", "source_of_water"),
+    ("Approving Authority", "approving_authority"),
+    ("Total Area Of Land (Sq Mtr)", "total_area_of_land"),
+    ("Total Number of Inventories/Flats/Sites/Plots/Villas", "total_number_of_inventories"),
+    ("Plan Approval Date", "plan_approval_date"),
+    ("Project Start Date", "project_start_date"),
+    ("Proposed Completion Date", "proposed_completion_date"),
+    ("Total Project Cost", "total_project_cost"),
+    ("Cost of Land", "cost_of_land"),
+    ("Estimated Cost of Construction", "estimated_cost_of_construction"),
+]
+
+DATE_FIELDS = {"plan_approval_date", "project_start_date", "proposed_completion_date"}
+
+
+def portal_value(field: str, value: str) -> str:
+    # The portal shows dates as DD-MM-YYYY, the CSV stores them as YYYY-MM-DD
+    if field in DATE_FIELDS and value:
+        return datetime.strptime(value, "%Y-%m-%d").strftime("%d-%m-%Y")
+    return value
+
+
+def render_project_page(row: Dict[str, str]) -> str:
+    parts = ["<html><body><div class='header'>"]
+    for label, field in HEADER_FIELDS:
+        if row.get(field):
+            parts.append(
+                f'<span class="pull-right user_name">{label} :<b>{escape(row[field])}</b></span><br>'
+            )
+    parts.append("</div><div class='details'>")
+    for label, field in DETAIL_FIELDS:
+        value = row.get(field)
+        if value:
+            parts.append(
+                f'<div class="row"><p class="text-right">{label}<span class="space_LR">:</span></p>'
+                f"<p>{escape(portal_value(field, value))}</p></div>"
+            )
+    parts.append('</div><div id="menu-complaints" class="tab-pane fade"><ul>')
+    for label, field in (
+        ("Complaints On this Promoter", "complaints_on_this_promoter"),
+        ("Complaints On this Project", "complaints_on_this_project"),
+    ):
+        if row.get(field):
+            count = int(float(row[field]))
+            parts.append(f'<li><a href="#">{label} ({count})</a></li>')
+    parts.append("</ul></div></body></html>")
+    return "".join(parts)
+
+
+class SyntheticCorpus:
+    """
+    Project pages for the CSV rows repeated `copies` times. Copy `i` of a row
+    gets project ID `project_id + i * SCALE_ID_OFFSET`.
+    """
+
+    def __init__(self, copies: int = 1):
+        with open(CSV_FILE, newline="", encoding="utf-8") as f:
+            self.rows = {int(row["project_id"]): row for row in csv.DictReader(f)}
+        self.copies = copies
+        self.statuses = {
+            row["rera_registration_number"]: row["rera_approval_status"]
+            for row in self.rows.values()
+            if row["rera_registration_number"]
+        }
+
+    @property
+    def project_ids(self):
+        return [
+            project_id + i * SCALE_ID_OFFSET
+            for i in range(self.copies)
+            for project_id in self.rows
+        ]
+
+    def project_page(self, project_id: int) -> Optional[str]:
+        row = self.rows.get(project_id % SCALE_ID_OFFSET)
+        if row is None or project_id // SCALE_ID_OFFSET >= self.copies:
+            return None
+        return render_project_page({**row, "project_id": str(project_id)})
+
+    def approval_status(self, reg_no: str) -> Optional[str]:
+        return self.statuses.get(reg_no)
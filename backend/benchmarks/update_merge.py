@@ -0,0 +1,114 @@
+"""
+Peak RSS and time of merging a full re-crawl into karnataka_projects.csv:
+the streaming merge-join in extract.merge_updates against the previous
+pandas DataFrame.update approach, at multiples of the current row count.
+
+    python benchmarks/update_merge.py --scale 1 --scale 10
+"""
+
+import os
+import sys
+import csv
+import json
+import time
+import argparse
+import tempfile
+import subprocess
+
+from fixtures import EXTRACT_DATA_DIR, peak_rss_mb, write_scaled_csv
+
+METHODS = ["streaming", "pandas"]
+
+
+def write_recrawl(db_filename: str, csv_filename: str, fieldnames):
+    """Every project scraped again, with a changed approval status."""
+    from sinks import SqliteSink
+
+    with open(csv_filename, newline="", encoding="utf-8") as f, SqliteSink(
+        db_filename, fieldnames
+    ) as sink:
+        for row in csv.DictReader(f):
+            sink.write({**row, "rera_approval_status": "REVOKED"})
+
+
+def pandas_merge(csv_filename: str, updates_filename: str):
+    """The merge update_existing_data did before switching to merge_updates."""
+    import pandas as pd
+    from sinks import read_projects
+
+    df = pd.read_csv(csv_filename, dtype=object)
+    df["project_id"] = df["project_id"].astype(int)
+    updated_df = read_projects(updates_filename).sort_values("project_id")
+    df.set_index("project_id", inplace=True)
+    updated_df.set_index("project_id", inplace=True)
+    df.update(updated_df)
+    df.reset_index(inplace=True)
+    df.to_csv(csv_filename, index=False)
+
+
+def run_child(method: str, csv_filename: str, updates_filename: str):
+    import logging
+
+    import extract
+
+    logging.disable(logging.CRITICAL)
+    start = time.perf_counter()
+    if method == "streaming":
+        extract.merge_updates(csv_filename, updates_filename)
+    else:
+        pandas_merge(csv_filename, updates_filename)
+    print(
+        json.dumps(
+            {
+                "seconds": time.perf_counter() - start,
+                "peak_rss_mb": peak_rss_mb(),
+            }
+        )
+    )
+
+
+def measure(method: str, csv_filename: str, updates_filename: str, workdir: str):
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--child", method,
+         csv_filename, updates_filename],
+        cwd=workdir,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scale", type=int, action="append")
+    parser.add_argument("--child", nargs=3, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        sys.path.insert(0, EXTRACT_DATA_DIR)
+        return run_child(*args.child)
+
+    print(f"{'rows':>10}{'method':>12}{'time (s)':>12}{'peak RSS (MB)':>16}")
+    for scale in args.scale or [1, 10]:
+        with tempfile.TemporaryDirectory() as workdir:
+            source = os.path.join(workdir, "source.csv")
+            updates = os.path.join(workdir, "updates.db")
+            fieldnames = write_scaled_csv(source, scale)
+            write_recrawl(updates, source, fieldnames)
+            with open(source, encoding="utf-8") as f:
+                rows = sum(1 for _ in f) - 1
+
+            for method in METHODS:
+                target = os.path.join(workdir, f"{method}.csv")
+                with open(source, "rb") as src, open(target, "wb") as dst:
+                    dst.write(src.read())
+                result = measure(method, target, updates, workdir)
+                print(
+                    f"{rows:>10}{method:>12}{result['seconds']:>12.2f}"
+                    f"{result['peak_rss_mb']:>16.1f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
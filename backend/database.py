@@ -1,7 +1,8 @@
+import os
 import sqlite3
-from typing import List, Dict
-
-from langchain_community.utilities.sql_database import SQLDatabase
+import functools
+from datetime import datetime, timezone
+from typing import List, Dict, Sequence, Tuple
 
 PROJECTS_DB_PATH = "rera_projects.db"
 
@@ -11,16 +12,35 @@ class SQLiteDatabase:
         self.db_path = db_path
         self.dialect = "sqlite"
 
-    def run(self, query: str) -> List[Dict[str, any]]:
+    def run(self, query: str, params: Sequence = ()) -> List[Dict[str, any]]:
         with sqlite3.connect(self.db_path) as conn:
             conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
-            cursor.execute(query)
+            cursor.execute(query, params)
             results = [dict(row) for row in cursor.fetchall()]
         return results
 
     def get_table_info(self) -> str:
-        return SQLDatabase.from_uri(f"sqlite:///{self.db_path}").get_table_info()
+        version, _ = self.get_version()
+        return _table_info(self.db_path, version)
+
+    def get_version(self) -> Tuple[str, datetime]:
+        """
+        Return a version tag and last modified time for the database file.
+        The tag changes whenever the database is rebuilt or written to.
+        """
+        stat = os.stat(self.db_path)
+        version = f"{stat.st_mtime_ns:x}-{stat.st_size:x}"
+        last_modified = datetime.fromtimestamp(int(stat.st_mtime), tz=timezone.utc)
+        return version, last_modified
+
+
+@functools.lru_cache(maxsize=4)
+def _table_info(db_path: str, version: str) -> str:
+    # Reflecting the schema through SQLAlchemy is slow, only redo it when the DB changes
+    from langchain_community.utilities.sql_database import SQLDatabase
+
+    return SQLDatabase.from_uri(f"sqlite:///{db_path}").get_table_info()
 
 
 def get_db_connection() -> SQLiteDatabase:
@@ -1,30 +1,38 @@
 import re
 import os
 import csv
+import heapq
+import tempfile
 import functools
+import itertools
+import contextlib
 import logging
-from typing import Optional, Tuple
-from dataclasses import dataclass, asdict, fields
+from typing import Any, Dict, Iterator, Optional, Set, Tuple
+from dataclasses import dataclass, fields
 from concurrent.futures import ThreadPoolExecutor
 from queue import Queue
-from threading import Thread
+from threading import Thread, local
 from datetime import datetime, timedelta
 
 from bs4 import BeautifulSoup
 import requests
-from requests.exceptions import ConnectionError, ChunkedEncodingError
-from urllib3.exceptions import ProtocolError
+from requests.adapters import HTTPAdapter
+from requests.exceptions import ChunkedEncodingError
 from tenacity import (
     before_sleep_log,
     retry,
     stop_after_attempt,
-    wait_incrementing,
+    wait_random_exponential,
+    retry_if_exception,
     retry_if_exception_type,
 )
 import sqlite3
 import pandas as pd
 
 from utils import reformat_date, refresh_cookies, clean_status
+from sinks import SqliteSink, open_sink, read_projects, to_number
+from rate_control import RateController, is_transient
+from summaries import rebuild_summaries, summary_exists
 
 
 def setup_logging():
@@ -40,13 +48,30 @@ def setup_logging():
     logging.getLogger("").addHandler(console)
 
 
-setup_logging()
 log = logging.getLogger("RERA_PARSER")
 
 CSV_FILE = "karnataka_projects.csv"
 DB_FILE = "../rera_projects.db"
 TABLE_NAME = "karnataka_projects"
+# Freshly scraped rows are staged in SQLite so they can be read back ordered by project ID
+TEMP_FILE = "_tmp.db"
+# Rows sorted in memory at a time when the CSV has to be re-sorted
+SORT_CHUNK_ROWS = 100_000
+# Rewritten CSVs keep the line endings pandas.to_csv gave them
+CSV_LINE_TERMINATOR = "\n"
+# Columns needed to decide which projects to re-scrape
+PLANNING_COLUMNS = [
+    "project_id",
+    "rera_acknowledgement_number",
+    "rera_registration_number",
+    "rera_approval_status",
+]
+STATUS_CHECKS_FILE = "status_checks.csv"
+FAILED_PROJECT_IDS_FILE = "failed_project_ids.txt"
 RERA_APPLICATION_PROCESSING_TIME_DAYS = 360
+# Statuses that are not expected to change again. TRANSFERED (sic, as the portal
+# spells it) means the registration moved to another promoter.
+FINAL_STATUSES = ("REJECTED", "WITHDRAWN", "REVOKED", "TRANSFERED")
 
 
 class NonExistingEntity(Exception):
@@ -55,7 +80,19 @@ class NonExistingEntity(Exception):
     pass
 
 
-@dataclass
+class TransientPortalError(Exception):
+    """Raised when the portal could not answer reliably and the request should be retried later."""
+
+    pass
+
+
+class UnsortedDataError(ValueError):
+    """Raised when a CSV that should be sorted by project_id is not."""
+
+    pass
+
+
+@dataclass(slots=True)
 class ProjectDetails:
     project_id: int
     project_name: Optional[str] = None
@@ -71,24 +108,81 @@ class ProjectDetails:
     longitude: Optional[str] = None
     source_of_water: Optional[str] = None
     approving_authority: Optional[str] = None
-    total_area_of_land: Optional[str] = None
-    total_number_of_inventories: Optional[str] = None
+    total_area_of_land: Optional[float] = None
+    total_number_of_inventories: Optional[float] = None
     plan_approval_date: Optional[str] = None
     project_start_date: Optional[str] = None
     proposed_completion_date: Optional[str] = None
-    total_project_cost: Optional[str] = None
-    cost_of_land: Optional[str] = None
-    estimated_cost_of_construction: Optional[str] = None
-    complaints_on_this_promoter: Optional[str] = None
-    complaints_on_this_project: Optional[str] = None
+    total_project_cost: Optional[float] = None
+    cost_of_land: Optional[float] = None
+    estimated_cost_of_construction: Optional[float] = None
+    complaints_on_this_promoter: Optional[float] = None
+    complaints_on_this_project: Optional[float] = None
     rera_approval_status: Optional[str] = None
 
+    def as_row(self) -> Dict[str, Any]:
+        # Shallow and much cheaper than dataclasses.asdict, which deep-copies every value
+        return {name: getattr(self, name) for name in PROJECT_FIELDS}
+
+
+PROJECT_FIELDS = [field.name for field in fields(ProjectDetails)]
+
+
+@dataclass
+class StatusRefreshPolicy:
+    """
+    Decides how often the projectViewDetails status of a project is re-fetched.
+    Projects whose status can still change are checked often, settled ones rarely.
+    """
+
+    # UNKNOWN projects still inside the RERA processing window
+    pending_interval: timedelta = timedelta(days=7)
+    # UNKNOWN projects that have been waiting longer than the processing window
+    stale_pending_interval: timedelta = timedelta(days=30)
+    # APPROVED projects registered within `recent_approval_window`
+    recently_approved_interval: timedelta = timedelta(days=14)
+    recent_approval_window: timedelta = timedelta(days=90)
+    approved_interval: timedelta = timedelta(days=90)
+    # REJECTED, WITHDRAWN, REVOKED and TRANSFERED projects rarely change again
+    final_interval: timedelta = timedelta(days=365)
+
+    def refresh_interval(
+        self, status: Optional[str], rera_date: Optional[datetime], now: datetime
+    ) -> timedelta:
+        age = None if rera_date is None or pd.isna(rera_date) else now - rera_date
+        if status in FINAL_STATUSES:
+            return self.final_interval
+        if status == "APPROVED":
+            if age is not None and age <= self.recent_approval_window:
+                return self.recently_approved_interval
+            return self.approved_interval
+        if age is not None and age > timedelta(
+            days=RERA_APPLICATION_PROCESSING_TIME_DAYS
+        ):
+            return self.stale_pending_interval
+        return self.pending_interval
+
+    def is_due(
+        self,
+        status: Optional[str],
+        rera_date: Optional[datetime],
+        last_checked: Optional[datetime],
+        now: datetime,
+    ) -> bool:
+        if last_checked is None:
+            return True
+        return now - last_checked >= self.refresh_interval(status, rera_date, now)
+
 
 class ReraDataParser:
     BASE_URL = "https://rera.karnataka.gov.in"
 
-    def __init__(self):
+    def __init__(self, rate_control: Optional[RateController] = None):
+        self.rate_control = rate_control or RateController()
         self.session = requests.Session()
+        adapter = HTTPAdapter(pool_maxsize=self.rate_control.max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
         self.session.request = functools.partial(self.session.request, timeout=30)
         self.session.headers = {
             "Accept": "*/*",
@@ -98,6 +192,10 @@ class ReraDataParser:
             "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/128.0.0.0 Safari/537.36",
             "Connection": "keep-alive",
         }
+        # Project ID -> time its approval status was last fetched successfully
+        self.status_checked_at: Dict[int, datetime] = {}
+        # Truncated attempts of the request the current worker thread is making
+        self._attempts = local()
 
     def get_cookies(self):
         """Sets or refreshes the cookies for the session by making a GET request to the base URL."""
@@ -112,23 +210,38 @@ class ReraDataParser:
     @refresh_cookies
     @retry(
         before_sleep=before_sleep_log(log, logging.INFO),
-        retry=retry_if_exception_type(
-            (ConnectionError, ChunkedEncodingError, ProtocolError)
-        ),
-        stop=stop_after_attempt(3),
-        wait=wait_incrementing(start=0.5, increment=0.25, max=1),
+        retry=retry_if_exception(is_transient)
+        | retry_if_exception_type(ChunkedEncodingError),
+        stop=stop_after_attempt(5),
+        wait=wait_random_exponential(multiplier=0.25, max=10),
         reraise=True,
     )
     def _post_request(self, endpoint: str, data: dict) -> str:
-        response = self.session.post(f"{self.BASE_URL}/{endpoint}", data=data)
-        response.raise_for_status()
+        with self.rate_control.request():
+            try:
+                response = self.session.post(f"{self.BASE_URL}/{endpoint}", data=data)
+            except ChunkedEncodingError:
+                self._attempts.truncated = getattr(self._attempts, "truncated", 0) + 1
+                raise
+            response.raise_for_status()
         return response.text
 
     def get_project_details(self, project_id: int) -> str:
+        self._attempts.truncated = 0
         try:
-            return self._post_request("projectDetails", {"action": str(project_id)})
+            html_content = self._post_request(
+                "projectDetails", {"action": str(project_id)}
+            )
         except ChunkedEncodingError:
+            # The portal breaks off the response for unknown IDs, but an overloaded
+            # portal does the same, so only trust it while the portal looks healthy
+            if self.rate_control.truncation_is_transient():
+                raise TransientPortalError(
+                    f"Project ID {project_id} could not be fetched, portal is unhealthy"
+                )
             raise NonExistingEntity(f"Project ID {project_id} does not exist")
+        self.rate_control.truncations.record_details(self._attempts.truncated)
+        return html_content
 
     def get_project_view_details(self, rera_reg_no: str) -> Optional[str]:
         data = {
@@ -140,9 +253,17 @@ class ReraDataParser:
             "subdistrict": "0",
             "btn1": "Search",
         }
+        self._attempts.truncated = 0
         try:
-            return self._post_request("projectViewDetails", data)
+            html_content = self._post_request("projectViewDetails", data)
+            self.rate_control.truncations.record_status(
+                self._attempts.truncated, succeeded=True
+            )
+            return html_content
         except Exception as e:
+            self.rate_control.truncations.record_status(
+                self._attempts.truncated, succeeded=False
+            )
             log.error(f"Exception in projectViewDetails for {rera_reg_no}")
         return None
 
@@ -213,7 +334,17 @@ class ReraDataParser:
             log.error(f"Unable to locate complaints. {e}")
         return None
 
-    def extract_project_details(self, project_id: int) -> ProjectDetails:
+    def extract_approval_status(self, project_id: int, rera_reg_no: str) -> str:
+        view_details_html = self.get_project_view_details(rera_reg_no)
+        if view_details_html is not None:
+            self.status_checked_at[project_id] = datetime.now()
+        return clean_status(
+            self.extract_data_from_project_view_details(view_details_html)
+        )
+
+    def extract_project_details(
+        self, project_id: int, fetch_status: bool = True
+    ) -> ProjectDetails:
         html_content = self.get_project_details(project_id)
         soup = BeautifulSoup(html_content, "html.parser")
 
@@ -237,11 +368,13 @@ class ReraDataParser:
         details.longitude = self.extract_value(soup, "Longitude")
         details.source_of_water = self.extract_value(soup, "Source of Water")
         details.approving_authority = self.extract_value(soup, "Approving Authority")
-        details.total_area_of_land = self.extract_value(
-            soup, "Total Area Of Land (Sq Mtr)"
+        details.total_area_of_land = to_number(
+            self.extract_value(soup, "Total Area Of Land (Sq Mtr)")
         )
-        details.total_number_of_inventories = self.extract_value(
-            soup, "Total Number of Inventories/Flats/Sites/Plots/Villas"
+        details.total_number_of_inventories = to_number(
+            self.extract_value(
+                soup, "Total Number of Inventories/Flats/Sites/Plots/Villas"
+            )
         )
         details.plan_approval_date = reformat_date(
             self.extract_value(soup, "Plan Approval Date")
@@ -252,42 +385,35 @@ class ReraDataParser:
         details.proposed_completion_date = reformat_date(
             self.extract_value(soup, "Proposed Completion Date")
         )
-        details.total_project_cost = self.extract_value(soup, "Total Project Cost")
-        details.cost_of_land = self.extract_value(soup, "Cost of Land")
-        details.estimated_cost_of_construction = self.extract_value(
-            soup, "Estimated Cost of Construction"
+        details.total_project_cost = to_number(
+            self.extract_value(soup, "Total Project Cost")
+        )
+        details.cost_of_land = to_number(self.extract_value(soup, "Cost of Land"))
+        details.estimated_cost_of_construction = to_number(
+            self.extract_value(soup, "Estimated Cost of Construction")
         )
-        details.complaints_on_this_promoter = self.extract_complains(
-            soup, "Complaints On this Promoter"
+        details.complaints_on_this_promoter = to_number(
+            self.extract_complains(soup, "Complaints On this Promoter")
         )
-        details.complaints_on_this_project = self.extract_complains(
-            soup, "Complaints On this Project"
+        details.complaints_on_this_project = to_number(
+            self.extract_complains(soup, "Complaints On this Project")
         )
 
-        if details.rera_registration_number:
-            view_details_html = self.get_project_view_details(
-                details.rera_registration_number
-            )
-            details.rera_approval_status = clean_status(
-                self.extract_data_from_project_view_details(view_details_html)
+        if fetch_status and details.rera_registration_number:
+            details.rera_approval_status = self.extract_approval_status(
+                project_id, details.rera_registration_number
             )
 
         return details
 
 
-def csv_writer(filename: str, queue: Queue):
-    with open(filename, mode="a", newline="", encoding="utf-8") as file:
-        fieldnames = [field.name for field in fields(ProjectDetails)]
-        writer = csv.DictWriter(file, fieldnames=fieldnames)
-        if file.tell() == 0:
-            writer.writeheader()
-
+def sink_writer(filename: str, queue: Queue):
+    with open_sink(filename, PROJECT_FIELDS) as sink:
         while True:
             data = queue.get()
             if data is None:
                 break
-            writer.writerow(asdict(data))
-            file.flush()
+            sink.write(data.as_row())
             queue.task_done()
 
     queue.task_done()
@@ -296,9 +422,17 @@ def csv_writer(filename: str, queue: Queue):
 failed_project_ids = list()
 
 
-def process_project(parser: ReraDataParser, project_id: int, queue: Queue):
+def save_failed_project_ids():
+    if len(failed_project_ids) > 0:
+        with open(FAILED_PROJECT_IDS_FILE, "w") as f:
+            f.writelines(f"{project_id}\n" for project_id in failed_project_ids)
+
+
+def process_project(
+    parser: ReraDataParser, project_id: int, queue: Queue, fetch_status: bool = True
+):
     try:
-        project_details = parser.extract_project_details(project_id)
+        project_details = parser.extract_project_details(project_id, fetch_status)
         queue.put(project_details)
         log.info(f"Project ;{project_id}; processed")
     except NonExistingEntity as e:
@@ -308,17 +442,33 @@ def process_project(parser: ReraDataParser, project_id: int, queue: Queue):
         log.error(f"Project ;{project_id}; FAILED: {e}")
 
 
-def run_concurrently(project_ids, filename=CSV_FILE):
-    parser = ReraDataParser()
+def run_concurrently(
+    project_ids,
+    filename=CSV_FILE,
+    status_project_ids=None,
+    parser: Optional[ReraDataParser] = None,
+):
+    """
+    Scrape `project_ids` into `filename`. When `status_project_ids` is given, the
+    approval status is only re-fetched for those projects.
+    """
+    parser = parser or ReraDataParser()
     queue = Queue()
 
-    # Start the CSV writer thread
-    writer_thread = Thread(target=csv_writer, args=(filename, queue), daemon=True)
+    # Start the sink writer thread
+    writer_thread = Thread(target=sink_writer, args=(filename, queue), daemon=True)
     writer_thread.start()
 
-    with ThreadPoolExecutor(max_workers=3) as executor:
+    # The rate controller decides how many of these workers are active at a time
+    with ThreadPoolExecutor(max_workers=parser.rate_control.max_workers) as executor:
         futures = [
-            executor.submit(process_project, parser, int(project_id), queue)
+            executor.submit(
+                process_project,
+                parser,
+                int(project_id),
+                queue,
+                status_project_ids is None or int(project_id) in status_project_ids,
+            )
             for project_id in project_ids
         ]
 
@@ -326,7 +476,7 @@ def run_concurrently(project_ids, filename=CSV_FILE):
         for future in futures:
             future.result()
 
-    # Signal the CSV writer thread that we're done
+    # Signal the sink writer thread that we're done
     queue.put(None)
     # Wait for all tasks in the queue to be processed
     queue.join()
@@ -334,16 +484,19 @@ def run_concurrently(project_ids, filename=CSV_FILE):
     writer_thread.join()
 
     # Write failed project IDs to a file
-    if len(failed_project_ids) > 0:
-        with open("failed_project_ids.txt", "w") as f:
-            f.writelines(failed_project_ids)
+    save_failed_project_ids()
+
+    save_status_checks(parser.status_checked_at)
 
 
 def retry_failed_projects():
-    with open("failed_project_ids.txt") as f:
+    with open(FAILED_PROJECT_IDS_FILE) as f:
         project_ids = f.readlines()
     log.info(f"Retrying {len(project_ids)} failures")
     run_concurrently(project_ids)
+    # Retried projects are appended in completion order
+    sort_csv_by_project_id(CSV_FILE)
+    sync_db(project_ids)
 
 
 def adhoc(project_id: int):
@@ -354,12 +507,51 @@ def adhoc(project_id: int):
 def csv_to_sqlite(csv_filename: str, db_filename: str):
     log.info(f"Converting {csv_filename} to SQLite database {db_filename}")
 
-    df = pd.read_csv(csv_filename)
+    df = read_projects(csv_filename)
     conn = sqlite3.connect(db_filename)
     df.to_sql(TABLE_NAME, conn, if_exists="replace", index=False)
+    rebuild_summaries(conn, TABLE_NAME)
     conn.close()
 
-    log.info(f"Conversion complete. Data stored in table '{TABLE_NAME}' in {DB_FILE}")
+    log.info(f"Conversion complete. Data stored in table '{TABLE_NAME}' in {db_filename}")
+
+
+def iter_csv_projects(csv_filename: str, project_ids: Set[int]) -> Iterator[Dict[str, Any]]:
+    """Stream the CSV rows of `project_ids`, with empty cells as None like scraped rows."""
+    with open(csv_filename, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            if int(row["project_id"]) in project_ids:
+                yield {name: value if value != "" else None for name, value in row.items()}
+
+
+def has_summaries(db_filename: str) -> bool:
+    if not os.path.exists(db_filename):
+        return False
+    conn = sqlite3.connect(db_filename)
+    try:
+        return summary_exists(conn)
+    finally:
+        conn.close()
+
+
+def sync_db(project_ids, csv_filename: str = CSV_FILE, db_filename: str = DB_FILE):
+    """
+    Bring the served database in step with the CSV after the rows of
+    `project_ids` were written to it. Those rows are read back from the CSV and
+    upserted, which keeps project_summary up to date incrementally and skips
+    IDs the CSV does not have. A database that is missing or predates
+    project_summary is rebuilt from the CSV instead.
+    """
+    if not has_summaries(db_filename):
+        csv_to_sqlite(csv_filename, db_filename)
+        return
+    project_ids = {int(project_id) for project_id in project_ids}
+    count = 0
+    with SqliteSink(db_filename, PROJECT_FIELDS) as sink:
+        for row in iter_csv_projects(csv_filename, project_ids):
+            sink.write(row)
+            count += 1
+    log.info(f"Applied {count} projects to {db_filename}")
 
 
 def parse_rera_date(rera_ack_or_reg_no):
@@ -371,6 +563,52 @@ def parse_rera_date(rera_ack_or_reg_no):
         return pd.NaT
 
 
+def load_status_checks() -> Dict[int, datetime]:
+    if not os.path.exists(STATUS_CHECKS_FILE):
+        return {}
+    checks_df = pd.read_csv(STATUS_CHECKS_FILE, parse_dates=["status_checked_at"])
+    return dict(
+        zip(
+            checks_df["project_id"].astype(int),
+            checks_df["status_checked_at"].dt.to_pydatetime(),
+        )
+    )
+
+
+def save_status_checks(checked_at: Dict[int, datetime]):
+    if not checked_at:
+        return
+    all_checks = {**load_status_checks(), **checked_at}
+    pd.DataFrame(
+        sorted(all_checks.items()), columns=["project_id", "status_checked_at"]
+    ).to_csv(STATUS_CHECKS_FILE, index=False)
+
+
+def select_status_refresh(df, policy: Optional[StatusRefreshPolicy] = None) -> Set[int]:
+    """Return the IDs of projects whose approval status is due to be re-fetched."""
+    policy = policy or StatusRefreshPolicy()
+    last_checked = load_status_checks()
+    now = datetime.now()
+
+    due = set()
+    for row in df.itertuples(index=False):
+        project_id = int(row.project_id)
+        status = row.rera_approval_status
+        # Approved and closed projects are dated by registration, pending ones by application
+        rera_number = (
+            row.rera_registration_number
+            if status == "APPROVED" or status in FINAL_STATUSES
+            else row.rera_acknowledgement_number
+        )
+        # Data before this ID do not follow fixed date format
+        rera_date = None
+        if project_id >= 10000 and isinstance(rera_number, str):
+            rera_date = parse_rera_date(rera_number)
+        if policy.is_due(status, rera_date, last_checked.get(project_id), now):
+            due.add(project_id)
+    return due
+
+
 def filter_projects_to_update(df) -> Tuple[int, int]:
     # Data before this ID do not follow fixed date format
     df = df[df["project_id"].astype(int) >= 10000]
@@ -429,67 +667,221 @@ def filter_projects_to_update(df) -> Tuple[int, int]:
     return lookup_start_project_id, latest_approved_project_id
 
 
+def iter_sorted_projects(db_filename: str) -> Iterator[Dict[str, Any]]:
+    """Stream the rows of a SQLite sink ordered by project ID."""
+    conn = sqlite3.connect(db_filename)
+    try:
+        cursor = conn.execute(f"SELECT * FROM {TABLE_NAME} ORDER BY project_id")
+        columns = [column[0] for column in cursor.description]
+        for row in cursor:
+            yield dict(zip(columns, row))
+    finally:
+        conn.close()
+
+
+def project_id_of(row: Dict[str, Any]) -> int:
+    return int(row["project_id"])
+
+
+def sort_csv_by_project_id(csv_filename: str, chunk_rows: int = SORT_CHUNK_ROWS):
+    """
+    Sort the CSV by project_id in place with an external merge sort, so memory
+    stays bounded by `chunk_rows`. When a project appears more than once, the
+    row written last wins.
+    """
+    directory = os.path.dirname(os.path.abspath(csv_filename))
+    sorted_filename = f"{csv_filename}.sorting"
+    run_filenames = []
+    try:
+        with open(csv_filename, newline="", encoding="utf-8") as source:
+            reader = csv.DictReader(source)
+            fieldnames = reader.fieldnames
+            while True:
+                chunk = list(itertools.islice(reader, chunk_rows))
+                if not chunk:
+                    break
+                chunk.sort(key=project_id_of)
+                with tempfile.NamedTemporaryFile(
+                    "w", newline="", encoding="utf-8", dir=directory, delete=False
+                ) as run:
+                    csv.DictWriter(run, fieldnames=fieldnames).writerows(chunk)
+                run_filenames.append(run.name)
+
+        with contextlib.ExitStack() as stack, open(
+            sorted_filename, "w", newline="", encoding="utf-8"
+        ) as merged:
+            runs = [
+                csv.DictReader(
+                    stack.enter_context(open(name, newline="", encoding="utf-8")),
+                    fieldnames=fieldnames,
+                )
+                for name in run_filenames
+            ]
+            writer = csv.DictWriter(
+                merged, fieldnames=fieldnames, lineterminator=CSV_LINE_TERMINATOR
+            )
+            writer.writeheader()
+            # heapq.merge keeps the file order of equal project IDs
+            previous = None
+            for row in heapq.merge(*runs, key=project_id_of):
+                if previous is not None and project_id_of(previous) != project_id_of(row):
+                    writer.writerow(previous)
+                previous = row
+            if previous is not None:
+                writer.writerow(previous)
+        os.replace(sorted_filename, csv_filename)
+    finally:
+        for name in run_filenames:
+            os.remove(name)
+        if os.path.exists(sorted_filename):
+            os.remove(sorted_filename)
+
+
+def merge_updates(csv_filename: str, updates_filename: str) -> int:
+    """
+    Merge freshly scraped rows into the CSV with a sorted merge-join on
+    project_id, one row at a time. Like DataFrame.update, empty scraped values
+    keep the stored data and scraped projects missing from the CSV are ignored.
+    A CSV that is out of order, e.g. after retry_failed_projects appended to
+    it, is sorted first. Returns the number of updated rows.
+    """
+    try:
+        return _merge_sorted_updates(csv_filename, updates_filename)
+    except UnsortedDataError as e:
+        log.info(f"{e}, sorting it before merging")
+    sort_csv_by_project_id(csv_filename)
+    return _merge_sorted_updates(csv_filename, updates_filename)
+
+
+def _merge_sorted_updates(csv_filename: str, updates_filename: str) -> int:
+    merged_filename = f"{csv_filename}.merging"
+    updates = iter_sorted_projects(updates_filename)
+    updated_count = 0
+    previous_project_id = None
+
+    try:
+        update = next(updates, None)
+        with open(csv_filename, newline="", encoding="utf-8") as source, open(
+            merged_filename, "w", newline="", encoding="utf-8"
+        ) as merged:
+            reader = csv.DictReader(source)
+            writer = csv.DictWriter(
+                merged, fieldnames=reader.fieldnames, lineterminator=CSV_LINE_TERMINATOR
+            )
+            writer.writeheader()
+            for row in reader:
+                project_id = project_id_of(row)
+                if previous_project_id is not None and project_id <= previous_project_id:
+                    raise UnsortedDataError(f"{csv_filename} is not sorted by project_id")
+                previous_project_id = project_id
+
+                while update is not None and update["project_id"] < project_id:
+                    update = next(updates, None)
+                if update is not None and update["project_id"] == project_id:
+                    for name, value in update.items():
+                        if value is not None and name in row:
+                            row[name] = value
+                    updated_count += 1
+                writer.writerow(row)
+        os.replace(merged_filename, csv_filename)
+    finally:
+        updates.close()
+        if os.path.exists(merged_filename):
+            os.remove(merged_filename)
+    return updated_count
+
+
 def update_existing_data():
-    df = pd.read_csv(CSV_FILE, dtype=object)
+    df = read_projects(CSV_FILE, columns=PLANNING_COLUMNS)
 
     start_project_id, end_project_id = filter_projects_to_update(df)
 
-    # Convert project_id to int for proper comparison
-    df["project_id"] = df["project_id"].astype(int)
-
     # Filter projects to update
     projects_to_update = df[
-        (df["project_id"].astype(int) >= int(start_project_id))
-        & (df["project_id"].astype(int) <= int(end_project_id))
+        (df["project_id"] >= int(start_project_id))
+        & (df["project_id"] <= int(end_project_id))
     ]
     project_ids = projects_to_update["project_id"].tolist()
+    status_project_ids = select_status_refresh(projects_to_update)
+    log.info(
+        f"Approval status due for {len(status_project_ids)} of {len(project_ids)} projects"
+    )
+    del df, projects_to_update
 
     # Create a temporary file for new data
-    temp_file = "_tmp.csv"
-    if os.path.exists(temp_file):
-        os.remove(temp_file)
+    if os.path.exists(TEMP_FILE):
+        os.remove(TEMP_FILE)
 
     log.info(f"Updating projects {project_ids[0]} to {project_ids[-1]}")
     # Run the concurrent update process
-    run_concurrently(project_ids, temp_file)
+    run_concurrently(project_ids, TEMP_FILE, status_project_ids)
+
+    # Stream the new data into the original CSV file
+    updated_count = merge_updates(CSV_FILE, TEMP_FILE)
+    log.info(f"Data updated successfully for {updated_count} projects")
 
-    # Read the temporary file
-    updated_df = pd.read_csv(temp_file, dtype=object)
-    updated_df["project_id"] = updated_df["project_id"].astype(int)
-    updated_df = updated_df.sort_values("project_id")
+    # Bring the served database up to date with the same rows
+    sync_db(row["project_id"] for row in iter_sorted_projects(TEMP_FILE))
 
-    # Update the original DataFrame with new data
-    df.set_index("project_id", inplace=True)
-    updated_df.set_index("project_id", inplace=True)
 
-    df.update(updated_df)
-    df.reset_index(inplace=True)
+def refresh_statuses(policy: Optional[StatusRefreshPolicy] = None):
+    """
+    Status-only crawl: re-fetch projectViewDetails for projects that are due,
+    without downloading the projectDetails page.
+    """
+    df = read_projects(CSV_FILE)
+    due = select_status_refresh(df, policy)
+    to_refresh = df[
+        df["project_id"].isin(due) & df["rera_registration_number"].notna()
+    ]
+    log.info(f"Refreshing approval status of {len(to_refresh)} projects")
 
-    # Save the updated DataFrame back to the original CSV file
+    parser = ReraDataParser()
+    with ThreadPoolExecutor(max_workers=parser.rate_control.max_workers) as executor:
+        statuses = list(
+            executor.map(
+                parser.extract_approval_status,
+                to_refresh["project_id"].astype(int),
+                to_refresh["rera_registration_number"],
+            )
+        )
+
+    # Failed lookups are not recorded as checked and keep their stored status
+    refreshed = {
+        project_id: status
+        for project_id, status in zip(to_refresh["project_id"].astype(int), statuses)
+        if project_id in parser.status_checked_at
+    }
+    df["rera_approval_status"] = (
+        df["project_id"].map(refreshed).fillna(df["rera_approval_status"])
+    )
     df.to_csv(CSV_FILE, index=False)
+    save_status_checks(parser.status_checked_at)
+    sync_db(refreshed)
 
-    log.info(f"Data updated successfully")
+    log.info(f"Refreshed {len(refreshed)} approval statuses")
 
 
-def fetch_new_data():
-    parser = ReraDataParser()
-    df = pd.read_csv(CSV_FILE, dtype=object)
+def fetch_new_data(
+    filename=CSV_FILE, parser: Optional[ReraDataParser] = None, db_filename=DB_FILE
+):
+    parser = parser or ReraDataParser()
+    df = read_projects(filename)
 
     last_project_id = df["project_id"].astype(int).max()
     current_project_id = last_project_id + 1
     non_existent_count = 0
     max_non_existent_count = 10
+    new_project_ids = []
 
     log.info(f"Starting processing from project ID: {current_project_id}")
 
-    with open(CSV_FILE, mode="a", newline="", encoding="utf-8") as file:
-        fieldnames = [field.name for field in fields(ProjectDetails)]
-        writer = csv.DictWriter(file, fieldnames=fieldnames)
-
+    with open_sink(filename, PROJECT_FIELDS) as sink:
         while non_existent_count < max_non_existent_count:
             try:
                 project_details = parser.extract_project_details(current_project_id)
-                writer.writerow(asdict(project_details))
+                sink.write(project_details.as_row())
+                new_project_ids.append(current_project_id)
                 log.info(f"Project ;{current_project_id}; processed")
                 non_existent_count = 0
             except NonExistingEntity as e:
@@ -498,13 +890,16 @@ def fetch_new_data():
                     f"Will try {max_non_existent_count - non_existent_count} more projects"
                 )
             except Exception as e:
+                # Only a fetched page shows the ID range goes on. Past the last project
+                # a struggling portal fails every ID, so failures count towards the
+                # stop as well and are left to retry_failed_projects
                 failed_project_ids.append(current_project_id)
                 log.error(f"Project ;{current_project_id}; FAILED: {e}")
-                non_existent_count = 0
+                non_existent_count += 1
             current_project_id += 1
         if non_existent_count == max_non_existent_count:
             log.info(
-                f"Got {max_non_existent_count} consecutive non-existent projects. Stopping processing."
+                f"Got {max_non_existent_count} consecutive missing or failed projects. Stopping processing."
             )
 
     log.info(
@@ -512,13 +907,15 @@ def fetch_new_data():
     )
 
     # Write failed project IDs to a file
-    if len(failed_project_ids) > 0:
-        with open("failed_project_ids.txt", "w") as f:
-            f.write("\n".join(failed_project_ids))
+    save_failed_project_ids()
+
+    sync_db(new_project_ids, filename, db_filename)
 
 
 if __name__ == "__main__":
+    setup_logging()
     # adhoc(12686)
     # fetch_new_data()
+    # refresh_statuses()
+    # csv_to_sqlite(CSV_FILE, DB_FILE)
     update_existing_data()
-    csv_to_sqlite(CSV_FILE, DB_FILE)
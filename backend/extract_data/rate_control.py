@@ -0,0 +1,260 @@
+import time
+import logging
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+from requests.exceptions import ConnectionError, HTTPError, Timeout
+
+logger = logging.getLogger(__name__)
+
+
+def is_transient(exc: BaseException) -> bool:
+    """Failures that mean the portal is struggling rather than the request being wrong."""
+    if isinstance(exc, (Timeout, ConnectionError)):
+        return True
+    if isinstance(exc, HTTPError) and exc.response is not None:
+        return exc.response.status_code >= 500 or exc.response.status_code == 429
+    return False
+
+
+class AdaptiveConcurrency:
+    """
+    AIMD concurrency limit. Every healthy response grows the limit by roughly one
+    slot per window of requests, every overload signal halves it.
+    """
+
+    def __init__(
+        self,
+        initial=3,
+        minimum=1,
+        maximum=16,
+        latency_target=5.0,
+        decrease_factor=0.5,
+        window=50,
+    ):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.latency_target = latency_target
+        self.decrease_factor = decrease_factor
+        self._limit = float(initial)
+        self._in_flight = 0
+        self._last_decrease = 0.0
+        self._outcomes = deque(maxlen=window)
+        self._cond = threading.Condition()
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    @property
+    def error_rate(self) -> float:
+        with self._cond:
+            if not self._outcomes:
+                return 0.0
+            return self._outcomes.count(False) / len(self._outcomes)
+
+    def acquire(self):
+        with self._cond:
+            while self._in_flight >= int(self._limit):
+                self._cond.wait()
+            self._in_flight += 1
+
+    def release(self, latency: float, overloaded: bool):
+        with self._cond:
+            self._in_flight -= 1
+            self._record(latency, overloaded)
+            self._cond.notify_all()
+
+    def record_overload(self):
+        """Overload detected after the request finished, e.g. from its response."""
+        with self._cond:
+            self._record(0.0, overloaded=True)
+
+    def _record(self, latency: float, overloaded: bool):
+        self._outcomes.append(not overloaded)
+        now = time.monotonic()
+        if overloaded or latency > self.latency_target:
+            # Requests already in flight report the same congestion, only react once per RTT
+            if now - self._last_decrease > max(latency, 1.0):
+                self._limit = max(self.minimum, self._limit * self.decrease_factor)
+                self._last_decrease = now
+                logger.info(f"Backing off, concurrency limit {self.limit}")
+        else:
+            self._limit = min(self.maximum, self._limit + 1 / self._limit)
+
+    def release_neutral(self):
+        """Release a slot without treating the outcome as a health signal."""
+        with self._cond:
+            self._in_flight -= 1
+            self._cond.notify_all()
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive transient failures and blocks all
+    callers until `reset_timeout` has passed. A single probe request is then let
+    through, and the timeout doubles every time the probe fails.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half-open"
+
+    def __init__(self, failure_threshold=10, reset_timeout=30.0, max_reset_timeout=600.0):
+        self.failure_threshold = failure_threshold
+        self.base_reset_timeout = reset_timeout
+        self.max_reset_timeout = max_reset_timeout
+        self.state = self.CLOSED
+        self.times_opened = 0
+        self._reset_timeout = reset_timeout
+        self._failures = 0
+        self._open_until = 0.0
+        self._probe_in_flight = False
+        self._cond = threading.Condition()
+
+    def before_request(self):
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                if self.state == self.OPEN and now >= self._open_until:
+                    self.state = self.HALF_OPEN
+                    self._probe_in_flight = False
+                if self.state == self.CLOSED:
+                    return
+                if self.state == self.HALF_OPEN and not self._probe_in_flight:
+                    self._probe_in_flight = True
+                    return
+                timeout = self._open_until - now if self.state == self.OPEN else None
+                self._cond.wait(timeout)
+
+    def record_success(self):
+        with self._cond:
+            if self.state != self.CLOSED:
+                logger.info("Portal recovered, closing circuit breaker")
+            self.state = self.CLOSED
+            self._failures = 0
+            self._reset_timeout = self.base_reset_timeout
+            self._cond.notify_all()
+
+    def record_failure(self):
+        with self._cond:
+            self._failures += 1
+            if self.state == self.HALF_OPEN:
+                self._reset_timeout = min(self.max_reset_timeout, self._reset_timeout * 2)
+                self._open()
+            elif self.state == self.CLOSED and self._failures >= self.failure_threshold:
+                self._open()
+
+    def record_neutral(self):
+        """
+        The portal answered, so earlier failures are no longer consecutive. Lets
+        the next caller probe again if a half-open probe was inconclusive.
+        """
+        with self._cond:
+            if self.state == self.CLOSED:
+                self._failures = 0
+            elif self.state == self.HALF_OPEN:
+                self._probe_in_flight = False
+                self._cond.notify_all()
+
+    def _open(self):
+        self.state = self.OPEN
+        self.times_opened += 1
+        self._open_until = time.monotonic() + self._reset_timeout
+        logger.warning(f"Portal unhealthy, pausing requests for {self._reset_timeout}s")
+        self._cond.notify_all()
+
+
+class TruncationMonitor:
+    """
+    The portal cuts off the response for unknown project IDs, but an overloaded
+    portal cuts off responses for real ones too, without any 5xx or timeout.
+    Truncations are tracked in their own windows to tell the two apart. Neither
+    of these happens on a healthy portal, so either one points at overload:
+    projectDetails responses that only came through after a truncated attempt
+    (an unknown ID is cut off every time) and cut off approval status lookups.
+    """
+
+    def __init__(self, window=50, max_recovered_rate=0.05, max_status_truncation_rate=0.05):
+        self.max_recovered_rate = max_recovered_rate
+        self.max_status_truncation_rate = max_status_truncation_rate
+        self._details = deque(maxlen=window)
+        self._status_attempts = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record_details(self, truncated_attempts: int):
+        """Record a projectDetails response that was fetched in the end."""
+        with self._lock:
+            self._details.append(truncated_attempts > 0)
+
+    def record_status(self, truncated_attempts: int, succeeded: bool):
+        with self._lock:
+            self._status_attempts.extend([True] * truncated_attempts)
+            if succeeded:
+                self._status_attempts.append(False)
+
+    @staticmethod
+    def _rate(outcomes) -> float:
+        return outcomes.count(True) / len(outcomes) if outcomes else 0.0
+
+    def suspicious(self) -> bool:
+        """Whether a projectDetails truncation is more likely overload than a missing ID."""
+        with self._lock:
+            return (
+                self._rate(self._details) > self.max_recovered_rate
+                or self._rate(self._status_attempts) > self.max_status_truncation_rate
+            )
+
+
+class RateController:
+    """Combines the adaptive concurrency limit and the circuit breaker for one client."""
+
+    def __init__(
+        self, concurrency=None, breaker=None, max_healthy_error_rate=0.2, truncations=None
+    ):
+        self.concurrency = concurrency or AdaptiveConcurrency()
+        self.breaker = breaker or CircuitBreaker()
+        self.truncations = truncations or TruncationMonitor()
+        self.max_healthy_error_rate = max_healthy_error_rate
+
+    @property
+    def max_workers(self) -> int:
+        return self.concurrency.maximum
+
+    def healthy(self) -> bool:
+        return (
+            self.breaker.state == CircuitBreaker.CLOSED
+            and self.concurrency.error_rate <= self.max_healthy_error_rate
+        )
+
+    def truncation_is_transient(self) -> bool:
+        """
+        Classify a projectDetails response that was cut off on every retry. When
+        the truncation windows point at overload it also counts as a failure for
+        the concurrency limit and the circuit breaker, which only see truncations
+        as neutral. An unhealthy error rate alone is not fed back: past the last
+        project nothing succeeds to outweigh it, and it would never recover.
+        """
+        if self.truncations.suspicious():
+            self.concurrency.record_overload()
+            self.breaker.record_failure()
+            return True
+        return not self.healthy()
+
+    @contextmanager
+    def request(self):
+        self.breaker.before_request()
+        self.concurrency.acquire()
+        start = time.monotonic()
+        try:
+            yield
+        except Exception as e:
+            if is_transient(e):
+                self.concurrency.release(time.monotonic() - start, overloaded=True)
+                self.breaker.record_failure()
+            else:
+                self.concurrency.release_neutral()
+                self.breaker.record_neutral()
+            raise
+        else:
+            self.concurrency.release(time.monotonic() - start, overloaded=False)
+            self.breaker.record_success()
@@ -0,0 +1,239 @@
+import os
+import csv
+import sqlite3
+import importlib.util
+from typing import Dict, List, Optional, Any
+
+import pandas as pd
+
+from summaries import apply_summary_delta, fetch_rows, summary_exists
+
+DEFAULT_BATCH_SIZE = 500
+TABLE_NAME = "karnataka_projects"
+
+# Columns that are stored as numbers, everything else is kept as text.
+# Numeric columns are floats because the portal leaves many of them empty.
+INTEGER_COLUMNS = {"project_id"}
+FLOAT_COLUMNS = {
+    "total_area_of_land",
+    "total_number_of_inventories",
+    "total_project_cost",
+    "cost_of_land",
+    "estimated_cost_of_construction",
+    "complaints_on_this_promoter",
+    "complaints_on_this_project",
+}
+
+# Parquet output is optional, install pyarrow to use it
+PARQUET_AVAILABLE = importlib.util.find_spec("pyarrow") is not None
+
+
+def column_type(name: str) -> str:
+    if name in INTEGER_COLUMNS:
+        return "INTEGER"
+    if name in FLOAT_COLUMNS:
+        return "REAL"
+    return "TEXT"
+
+
+def pandas_dtypes(fieldnames: List[str]) -> Dict[str, str]:
+    dtype_map = {"INTEGER": "int64", "REAL": "float64", "TEXT": "object"}
+    return {name: dtype_map[column_type(name)] for name in fieldnames}
+
+
+def to_number(value: Any, cast=float) -> Optional[Any]:
+    if value is None or value == "":
+        return None
+    try:
+        return cast(float(str(value).replace(",", "")))
+    except (TypeError, ValueError):
+        return None
+
+
+def typed_row(row: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert the scraped text values of a row to their column types."""
+    typed = {}
+    for name, value in row.items():
+        kind = column_type(name)
+        if kind == "INTEGER":
+            typed[name] = to_number(value, int)
+        elif kind == "REAL":
+            typed[name] = to_number(value)
+        else:
+            typed[name] = value
+    return typed
+
+
+class ProjectSink:
+    """
+    Buffers scraped rows and writes them out in batches.
+    Subclasses implement `_write_batch` for a specific storage format.
+    """
+
+    def __init__(
+        self, filename: str, fieldnames: List[str], batch_size=DEFAULT_BATCH_SIZE
+    ):
+        self.filename = filename
+        self.fieldnames = fieldnames
+        self.batch_size = batch_size
+        self._buffer: List[Dict[str, Any]] = []
+
+    def write(self, row: Dict[str, Any]):
+        self._buffer.append(row)
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if self._buffer:
+            self._write_batch(self._buffer)
+            self._buffer = []
+
+    def close(self):
+        self.flush()
+
+    def _write_batch(self, rows: List[Dict[str, Any]]):
+        raise NotImplementedError
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class CsvSink(ProjectSink):
+    """Appends rows to a CSV file, flushing once per batch instead of per row."""
+
+    def __init__(self, filename, fieldnames, batch_size=DEFAULT_BATCH_SIZE):
+        super().__init__(filename, fieldnames, batch_size)
+        self._file = open(filename, mode="a", newline="", encoding="utf-8")
+        self._writer = csv.DictWriter(self._file, fieldnames=fieldnames)
+        if self._file.tell() == 0:
+            self._writer.writeheader()
+
+    def _write_batch(self, rows):
+        self._writer.writerows(rows)
+        self._file.flush()
+
+    def close(self):
+        super().close()
+        self._file.close()
+
+
+class SqliteSink(ProjectSink):
+    """
+    Upserts rows straight into the projects table, one transaction per batch.
+    Empty values keep what is already stored, like the CSV merge does, so rows
+    scraped without a status lookup do not erase the stored approval status.
+    In a database built with summaries (see csv_to_sqlite) the summary table is
+    updated in the same transaction. Staging files start without one and skip it.
+    """
+
+    def __init__(
+        self,
+        filename,
+        fieldnames,
+        batch_size=DEFAULT_BATCH_SIZE,
+        table_name=TABLE_NAME,
+    ):
+        super().__init__(filename, fieldnames, batch_size)
+        self.table_name = table_name
+        self._conn = sqlite3.connect(filename, check_same_thread=False)
+        columns = ", ".join(f'"{name}" {column_type(name)}' for name in fieldnames)
+        with self._conn:
+            self._conn.execute(f"CREATE TABLE IF NOT EXISTS {table_name} ({columns})")
+            self._conn.execute(
+                f"CREATE UNIQUE INDEX IF NOT EXISTS idx_{table_name}_project_id "
+                f"ON {table_name} (project_id)"
+            )
+        self._maintain_summaries = summary_exists(self._conn)
+        placeholders = ", ".join("?" * len(fieldnames))
+        updates = ", ".join(
+            f"{name} = COALESCE(excluded.{name}, {name})"
+            for name in fieldnames
+            if name != "project_id"
+        )
+        self._upsert_sql = (
+            f"INSERT INTO {table_name} ({', '.join(fieldnames)}) "
+            f"VALUES ({placeholders}) "
+            f"ON CONFLICT (project_id) DO UPDATE SET {updates}"
+        )
+
+    def _write_batch(self, rows):
+        typed_rows = [typed_row(row) for row in rows]
+        values = [tuple(row[name] for name in self.fieldnames) for row in typed_rows]
+        project_ids = list(dict.fromkeys(row["project_id"] for row in typed_rows))
+        with self._conn:
+            if not self._maintain_summaries:
+                self._conn.executemany(self._upsert_sql, values)
+                return
+            old_rows = fetch_rows(self._conn, self.table_name, project_ids)
+            self._conn.executemany(self._upsert_sql, values)
+            # Merged values can differ from the scraped ones, so read them back
+            new_rows = fetch_rows(self._conn, self.table_name, project_ids)
+            apply_summary_delta(self._conn, old_rows, new_rows)
+
+    def close(self):
+        super().close()
+        self._conn.close()
+
+
+class ParquetSink(ProjectSink):
+    """
+    Writes rows to a Parquet file with typed columns, one row group per batch.
+    Parquet files cannot be appended to, so an existing file is overwritten.
+    """
+
+    def __init__(self, filename, fieldnames, batch_size=DEFAULT_BATCH_SIZE):
+        if not PARQUET_AVAILABLE:
+            raise ValueError(f"Writing {filename} requires pyarrow to be installed")
+        super().__init__(filename, fieldnames, batch_size)
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        arrow_types = {"INTEGER": pa.int64(), "REAL": pa.float64(), "TEXT": pa.string()}
+        self._pa = pa
+        self._schema = pa.schema(
+            [(name, arrow_types[column_type(name)]) for name in fieldnames]
+        )
+        self._writer = pq.ParquetWriter(filename, self._schema)
+
+    def _write_batch(self, rows):
+        typed_rows = [typed_row(row) for row in rows]
+        table = self._pa.Table.from_pylist(typed_rows, schema=self._schema)
+        self._writer.write_table(table, row_group_size=len(typed_rows))
+
+    def close(self):
+        super().close()
+        self._writer.close()
+
+
+SINKS = {
+    ".csv": CsvSink,
+    ".db": SqliteSink,
+    ".parquet": ParquetSink,
+}
+
+
+def open_sink(filename: str, fieldnames: List[str], **kwargs) -> ProjectSink:
+    """Pick a sink based on the file extension."""
+    extension = os.path.splitext(filename)[1].lower()
+    if extension not in SINKS:
+        raise ValueError(f"Unsupported output format: {filename}")
+    return SINKS[extension](filename, fieldnames, **kwargs)
+
+
+def read_projects(
+    filename: str, table_name=TABLE_NAME, columns: Optional[List[str]] = None
+) -> pd.DataFrame:
+    """Load scraped projects from any sink output with typed columns."""
+    extension = os.path.splitext(filename)[1].lower()
+    if extension == ".parquet":
+        return pd.read_parquet(filename, columns=columns)
+    if extension == ".db":
+        selected = ", ".join(columns) if columns else "*"
+        with sqlite3.connect(filename) as conn:
+            return pd.read_sql(f"SELECT {selected} FROM {table_name}", conn)
+
+    fieldnames = columns or pd.read_csv(filename, nrows=0).columns.tolist()
+    return pd.read_csv(filename, usecols=columns, dtype=pandas_dtypes(fieldnames))
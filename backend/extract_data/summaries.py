@@ -0,0 +1,182 @@
+import sqlite3
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+SUMMARY_TABLE = "project_summary"
+GEOHASH_PRECISION = 5  # Cells of roughly 5km x 5km
+GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+# Dimension name -> function returning the key of a project row in that dimension
+SUMMARY_DIMENSIONS = {
+    "promoter": lambda row: normalize(row.get("promoter_name")),
+    "year": lambda row: start_year(row),
+    "taluk": lambda row: normalize(row.get("taluk")),
+    "status": lambda row: row.get("rera_approval_status"),
+    "geohash": lambda row: project_geohash(row),
+    # Answers "projects by <promoter> per year" without scanning the projects table
+    "promoter_year": lambda row: join_keys(
+        normalize(row.get("promoter_name")), start_year(row)
+    ),
+}
+
+SUMMARY_COLUMNS = [
+    "project_id",
+    "promoter_name",
+    "taluk",
+    "rera_approval_status",
+    "project_start_date",
+    "latitude",
+    "longitude",
+    "total_area_of_land",
+    "total_project_cost",
+]
+
+
+def normalize(value: Any) -> Optional[str]:
+    if not isinstance(value, str) or not value.strip():
+        return None
+    return " ".join(value.upper().split())
+
+
+def start_year(row: Dict[str, Any]) -> Optional[str]:
+    date = row.get("project_start_date")
+    return date[:4] if isinstance(date, str) and len(date) >= 4 else None
+
+
+def join_keys(*keys: Optional[str]) -> Optional[str]:
+    return None if None in keys else "|".join(keys)
+
+
+def to_float(value: Any) -> Optional[float]:
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if number != number else number  # NaN
+
+
+def geohash_encode(lat: float, lon: float, precision: int = GEOHASH_PRECISION) -> str:
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, bit_count, even = [], 0, 0, True
+    while len(chars) < precision:
+        value, bounds = (lon, lon_range) if even else (lat, lat_range)
+        mid = (bounds[0] + bounds[1]) / 2
+        bits <<= 1
+        if value >= mid:
+            bits |= 1
+            bounds[0] = mid
+        else:
+            bounds[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(GEOHASH_ALPHABET[bits])
+            bits, bit_count = 0, 0
+    return "".join(chars)
+
+
+def project_geohash(row: Dict[str, Any]) -> Optional[str]:
+    lat, lon = to_float(row.get("latitude")), to_float(row.get("longitude"))
+    if lat is None or lon is None or not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        return None
+    # The portal uses 0 as a placeholder for missing coordinates
+    if lat == 0 and lon == 0:
+        return None
+    return geohash_encode(lat, lon)
+
+
+def summary_contributions(rows: Iterable[Dict[str, Any]], sign: int = 1):
+    """Aggregate (dimension, key) -> [count, total area, total cost] for `rows`."""
+    totals = defaultdict(lambda: [0, 0.0, 0.0])
+    for row in rows:
+        area = to_float(row.get("total_area_of_land")) or 0.0
+        cost = to_float(row.get("total_project_cost")) or 0.0
+        for dimension, key_of in SUMMARY_DIMENSIONS.items():
+            key = key_of(row)
+            if key is None:
+                continue
+            total = totals[(dimension, key)]
+            total[0] += sign
+            total[1] += sign * area
+            total[2] += sign * cost
+    return totals
+
+
+def create_summary_table(conn: sqlite3.Connection):
+    conn.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS {SUMMARY_TABLE} (
+            dimension TEXT NOT NULL,
+            key TEXT NOT NULL,
+            project_count INTEGER NOT NULL,
+            total_area REAL NOT NULL,
+            total_cost REAL NOT NULL,
+            PRIMARY KEY (dimension, key)
+        )
+        """
+    )
+
+
+def summary_exists(conn: sqlite3.Connection) -> bool:
+    return (
+        conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+            (SUMMARY_TABLE,),
+        ).fetchone()
+        is not None
+    )
+
+
+def fetch_rows(
+    conn: sqlite3.Connection, table_name: str, project_ids: Optional[List[int]] = None
+) -> List[Dict[str, Any]]:
+    query = f"SELECT {', '.join(SUMMARY_COLUMNS)} FROM {table_name}"
+    params: Tuple = ()
+    if project_ids is not None:
+        query += f" WHERE project_id IN ({', '.join('?' * len(project_ids))})"
+        params = tuple(project_ids)
+    cursor = conn.execute(query, params)
+    columns = [column[0] for column in cursor.description]
+    return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def rebuild_summaries(conn: sqlite3.Connection, table_name: str):
+    """Recompute the summary table from scratch."""
+    totals = summary_contributions(fetch_rows(conn, table_name))
+    with conn:
+        conn.execute(f"DROP TABLE IF EXISTS {SUMMARY_TABLE}")
+        create_summary_table(conn)
+        conn.executemany(
+            f"INSERT INTO {SUMMARY_TABLE} VALUES (?, ?, ?, ?, ?)",
+            [(dimension, key, *total) for (dimension, key), total in totals.items()],
+        )
+
+
+def apply_summary_delta(
+    conn: sqlite3.Connection,
+    old_rows: Iterable[Dict[str, Any]],
+    new_rows: Iterable[Dict[str, Any]],
+):
+    """
+    Move the summaries from `old_rows` to `new_rows` for rows that were replaced.
+    Runs inside the caller's transaction.
+    """
+    totals = summary_contributions(old_rows, sign=-1)
+    for key, total in summary_contributions(new_rows).items():
+        totals[key] = [a + b for a, b in zip(totals[key], total)]
+
+    conn.executemany(
+        f"""
+        INSERT INTO {SUMMARY_TABLE} VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT (dimension, key) DO UPDATE SET
+            project_count = project_count + excluded.project_count,
+            total_area = total_area + excluded.total_area,
+            total_cost = total_cost + excluded.total_cost
+        """,
+        [
+            (dimension, key, *total)
+            for (dimension, key), total in totals.items()
+            if any(total)
+        ],
+    )
+    conn.execute(f"DELETE FROM {SUMMARY_TABLE} WHERE project_count <= 0")
@@ -1,12 +1,31 @@
 import os
+import functools
+import threading
 from typing import Tuple, Optional
 
-import requests
-from dotenv import load_dotenv
+_local = threading.local()
 
-load_dotenv()
 
-HERE_API_KEY = os.getenv("HERE_API_KEY")
+@functools.lru_cache(maxsize=None)
+def load_environment():
+    from dotenv import load_dotenv
+
+    load_dotenv()
+
+
+def get_session():
+    """
+    HTTP session of the calling thread, created on first use. Searches geocode
+    from Flask request threads and the prepare thread pool, and a requests
+    Session is not guaranteed to be thread-safe.
+    """
+    session = getattr(_local, "session", None)
+    if session is None:
+        import requests
+
+        load_environment()
+        session = _local.session = requests.Session()
+    return session
 
 
 def geocode_location(location: str) -> Optional[Tuple[float, float]]:
@@ -14,14 +33,15 @@ def geocode_location(location: str) -> Optional[Tuple[float, float]]:
     Convert a location name to latitude and longitude using HERE Maps API.
     """
     base_url = "https://geocode.search.hereapi.com/v1/autosuggest"
+    session = get_session()
     params = {
         "q": location,
         "in": "circle:12.9716,77.5946;r=100000",  # Center of Bangalore with 100km radius
-        "apiKey": HERE_API_KEY,
+        "apiKey": os.getenv("HERE_API_KEY"),
     }
 
     try:
-        response = requests.get(base_url, params=params)
+        response = session.get(base_url, params=params)
         response.raise_for_status()  # Raise an exception for bad status codes
         results = response.json()
 
@@ -0,0 +1,140 @@
+import time
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, Optional
+
+PREPARED_QUERY_TTL = 60  # Seconds a prepared query can be reused
+PREPARED_QUERY_WAIT = 5  # Seconds a search waits for a running preparation
+MAX_PREPARED_QUERIES = 256
+PREPARE_WORKERS = 4
+
+
+class QueryCancelled(Exception):
+    """Raised inside a prepare task once nobody is waiting for its result."""
+
+    pass
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.lower().split())
+
+
+class PreparedQuery:
+    def __init__(self):
+        self.future: Optional[Future] = None
+        self.created_at = time.monotonic()
+        self.clients = set()
+        self._cancelled = threading.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def check_cancelled(self):
+        if self._cancelled.is_set():
+            raise QueryCancelled()
+
+    def cancel(self):
+        self._cancelled.set()
+        self.future.cancel()
+
+    def result(self, timeout: Optional[float] = None) -> Dict[str, Any]:
+        return self.future.result(timeout)
+
+
+class PreparedQueryCache:
+    """
+    Runs the expensive part of a search (location extraction, geocoding and SQL
+    generation) in the background while the user is still typing. Results are
+    kept for a short time keyed by the normalized query text. When a client
+    prepares a new query, work for its previous one is cancelled unless another
+    client is also waiting for it.
+    """
+
+    def __init__(
+        self,
+        plan: Callable[[str, PreparedQuery], Dict[str, Any]],
+        ttl=PREPARED_QUERY_TTL,
+        max_entries=MAX_PREPARED_QUERIES,
+        max_workers=PREPARE_WORKERS,
+    ):
+        self._plan = plan
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_workers = max_workers
+        self._executor = None
+        self._entries: "OrderedDict[str, PreparedQuery]" = OrderedDict()
+        self._latest_by_client: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def prepare(self, query: str, client_id: Optional[str] = None) -> PreparedQuery:
+        key = normalize_query(query)
+        with self._lock:
+            self._evict_expired()
+            if client_id is not None:
+                self._supersede(client_id, key)
+
+            entry = self._entries.get(key)
+            if entry is None or entry.cancelled:
+                entry = PreparedQuery()
+                entry.future = self._get_executor().submit(self._plan, query, entry)
+                self._entries[key] = entry
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)[1].cancel()
+            if client_id is not None:
+                entry.clients.add(client_id)
+            return entry
+
+    @contextmanager
+    def waiting(self, query: str) -> Iterator[Optional[PreparedQuery]]:
+        """
+        Yield the finished or in-flight preparation of `query`, if any. The caller
+        counts as one of its clients until the block exits, so the preparing
+        client moving on to another query does not cancel it mid-wait.
+        """
+        waiter = object()
+        with self._lock:
+            self._evict_expired()
+            entry = self._entries.get(normalize_query(query))
+            if entry is not None and not entry.cancelled:
+                entry.clients.add(waiter)
+            else:
+                entry = None
+        try:
+            yield entry
+        finally:
+            if entry is not None:
+                with self._lock:
+                    entry.clients.discard(waiter)
+
+    def _supersede(self, client_id: str, key: str):
+        previous_key = self._latest_by_client.get(client_id)
+        self._latest_by_client[client_id] = key
+        if previous_key is None or previous_key == key:
+            return
+        previous = self._entries.get(previous_key)
+        if previous is None:
+            return
+        previous.clients.discard(client_id)
+        if not previous.clients and not previous.future.done():
+            previous.cancel()
+            del self._entries[previous_key]
+
+    def _evict_expired(self):
+        now = time.monotonic()
+        while self._entries:
+            key, entry = next(iter(self._entries.items()))
+            if now - entry.created_at < self.ttl:
+                break
+            del self._entries[key]
+        if len(self._latest_by_client) > self.max_entries:
+            self._latest_by_client.clear()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="prepare"
+            )
+        return self._executor
@@ -1,22 +1,15 @@
-import os
-import json
-from typing import Dict, Any
+import functools
+from typing import Dict, Any, TYPE_CHECKING
 
-from dotenv import load_dotenv
-from langchain_core.prompts import PromptTemplate
-from langchain_core.output_parsers import JsonOutputParser
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_community.utilities import SQLDatabase
+if TYPE_CHECKING:
+    from database import SQLiteDatabase
 
+# LangChain and the Gemini client are slow to import, so they are only loaded
+# when the first query needs them and then reused for the life of the process.
 
-load_dotenv()
+LLM_MODEL = "gemini-pro"
 
-os.environ["GOOGLE_API_KEY"] = os.getenv("GOOGLE_API_KEY")
-os.environ["OPENAI_API_KEY"] = os.getenv("OPENAI_API_KEY")
-
-
-def extract_location_from_query(user_query: str) -> Dict[str, Any]:
-    _EXTRACTION_TEMPLATE = """Given an input question about real estate projects, extract the location information (if any) and the main query.
+_EXTRACTION_TEMPLATE = """Given an input question about real estate projects, extract the location information (if any) and the main query.
     Only consider locations within Bangalore, Karnataka, India.
     If a location outside Bangalore is mentioned, set the location to Bangalore.
     If the query does not contain any location information, set the location value to null.
@@ -51,20 +44,7 @@ def extract_location_from_query(user_query: str) -> Dict[str, Any]:
        Output: {{"location": null, "query": "projects by prestige"}}
     """
 
-    EXTRACTION_PROMPT = PromptTemplate(
-        input_variables=["input"], template=_EXTRACTION_TEMPLATE
-    )
-
-    llm = ChatGoogleGenerativeAI(model="gemini-pro")
-    json_parser = JsonOutputParser()
-
-    extraction_chain = EXTRACTION_PROMPT | llm | json_parser
-
-    return extraction_chain.invoke({"input": user_query})
-
-
-def transform_query(user_query: str, db: SQLDatabase) -> str:
-    _SQL_TEMPLATE = """Given an input question, return the syntactically correct {dialect} query to run for that question.
+_SQL_TEMPLATE = """Given an input question, return the syntactically correct {dialect} query to run for that question.
     - Pay attention to use only the column names you can see in the tables below. Be careful to not query for columns that do not exist.
     - Use 'LIKE' instead of '=' for matching the following columns after converting them to uppercase: 'promoter_name', 'district', 'source_of_water', 'approving_authority'.
     - Always include the following filters: land_under_litigation = 'NO', rera_approval_status = 'APPROVED', 'project_name' is not NULL, 'latitude' is not NULL, 'longitude' is not NULL.
@@ -79,15 +59,43 @@ def transform_query(user_query: str, db: SQLDatabase) -> str:
 
     Question: {input}"""
 
-    SQL_PROMPT = PromptTemplate(
+
+@functools.lru_cache(maxsize=None)
+def get_llm():
+    from dotenv import load_dotenv
+    from langchain_google_genai import ChatGoogleGenerativeAI
+
+    load_dotenv()
+    return ChatGoogleGenerativeAI(model=LLM_MODEL)
+
+
+@functools.lru_cache(maxsize=None)
+def get_extraction_chain():
+    from langchain_core.prompts import PromptTemplate
+    from langchain_core.output_parsers import JsonOutputParser
+
+    extraction_prompt = PromptTemplate(
+        input_variables=["input"], template=_EXTRACTION_TEMPLATE
+    )
+    return extraction_prompt | get_llm() | JsonOutputParser()
+
+
+@functools.lru_cache(maxsize=None)
+def get_sql_chain():
+    from langchain_core.prompts import PromptTemplate
+
+    sql_prompt = PromptTemplate(
         input_variables=["input", "table_info", "dialect"], template=_SQL_TEMPLATE
     )
+    return sql_prompt | get_llm()
 
-    llm = ChatGoogleGenerativeAI(model="gemini-pro")
 
-    sql_chain = SQL_PROMPT | llm
+def extract_location_from_query(user_query: str) -> Dict[str, Any]:
+    return get_extraction_chain().invoke({"input": user_query})
+
 
-    response = sql_chain.invoke(
+def transform_query(user_query: str, db: "SQLiteDatabase") -> str:
+    response = get_sql_chain().invoke(
         {"input": user_query, "table_info": db.get_table_info(), "dialect": db.dialect}
     )
     return response.content
@@ -0,0 +1,220 @@
+import functools
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from database import SQLiteDatabase
+
+EARTH_RADIUS_KM = 6371
+
+
+def decimal_degrees(latitude, longitude) -> Optional[Tuple[float, float]]:
+    """Parse a stored coordinate pair, None when it is not plain decimal degrees."""
+    try:
+        lat, lon = float(latitude), float(longitude)
+    except (TypeError, ValueError):
+        return None
+    if -90 <= lat <= 90 and -180 <= lon <= 180:
+        return lat, lon
+    return None
+
+
+def haversine_km(lat: float, lon: float, lats, lons):
+    """Great-circle distances in km from a point to arrays of latitudes and longitudes."""
+    import numpy as np
+
+    lat, lon = np.radians(lat), np.radians(lon)
+    lats, lons = np.radians(lats), np.radians(lons)
+    a = (
+        np.sin((lats - lat) / 2) ** 2
+        + np.cos(lat) * np.cos(lats) * np.sin((lons - lon) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+class ProjectSpatialIndex:
+    """
+    Spatial index over the project coordinates in the database.
+
+    Nearest-neighbour queries use a ball tree with the haversine metric on
+    (lat, lon) in radians, or measure the candidates directly when they are a
+    small part of the index. Polygon queries prefilter by bounding box on the
+    latitude-sorted coordinates before the exact containment test.
+    """
+
+    def __init__(self, project_ids: Sequence[int], coordinates: Sequence[Tuple[float, float]]):
+        import numpy as np
+
+        self._np = np
+        self.project_ids = np.asarray(project_ids, dtype=np.int64)
+        self.coordinates = np.asarray(coordinates, dtype=np.float64).reshape(-1, 2)
+
+        order = np.argsort(self.coordinates[:, 0])
+        self._sorted_ids = self.project_ids[order]
+        self._sorted_lats = self.coordinates[order, 0]
+        self._sorted_lons = self.coordinates[order, 1]
+
+        self._id_order = np.argsort(self.project_ids)
+        self._ids_by_id = self.project_ids[self._id_order]
+
+    def __len__(self):
+        return len(self.project_ids)
+
+    @functools.cached_property
+    def tree(self):
+        # scikit-learn is slow to import, polygon and small candidate sets do without it
+        from sklearn.neighbors import BallTree
+
+        return BallTree(self._np.radians(self.coordinates), metric="haversine")
+
+    @classmethod
+    def from_db(cls, db: SQLiteDatabase) -> "ProjectSpatialIndex":
+        rows = db.run(
+            """
+            SELECT project_id, latitude, longitude
+            FROM karnataka_projects
+            WHERE latitude IS NOT NULL AND longitude IS NOT NULL
+            """
+        )
+        project_ids, coordinates = [], []
+        for row in rows:
+            lat_lon = decimal_degrees(row["latitude"], row["longitude"])
+            if lat_lon is not None:
+                project_ids.append(int(row["project_id"]))
+                coordinates.append(lat_lon)
+        return cls(project_ids, coordinates)
+
+    def positions(self, project_ids: Iterable[int]):
+        """Positions of the indexed projects among `project_ids`, in index order."""
+        np = self._np
+        ids = np.fromiter(project_ids, dtype=np.int64)
+        if not len(self) or not len(ids):
+            return np.zeros(0, dtype=np.int64)
+        found = np.searchsorted(self._ids_by_id, ids).clip(max=len(self) - 1)
+        found = found[self._ids_by_id[found] == ids]
+        return np.unique(self._id_order[found])
+
+    def nearest(
+        self,
+        lat: float,
+        lon: float,
+        k: int,
+        candidate_ids: Optional[Iterable[int]] = None,
+    ) -> List[Tuple[int, float]]:
+        """
+        Return up to `k` (project_id, distance_km) pairs closest to the point,
+        restricted to `candidate_ids` when given.
+        """
+        np = self._np
+        if candidate_ids is None:
+            candidates = None
+            limit = k
+        else:
+            candidates = self.positions(candidate_ids)
+            limit = min(len(candidates), k)
+            # Widening the tree search for sparse candidates ends up visiting most
+            # of the index, measuring the candidates directly is cheaper
+            if len(candidates) * 2 < len(self):
+                lats, lons = self.coordinates[candidates].T
+                distances = haversine_km(lat, lon, lats, lons)
+                closest = np.argsort(distances, kind="stable")[:k]
+                return list(
+                    zip(
+                        self.project_ids[candidates[closest]].tolist(),
+                        distances[closest].tolist(),
+                    )
+                )
+
+        if candidates is not None:
+            is_candidate = np.zeros(len(self), dtype=bool)
+            is_candidate[candidates] = True
+
+        # Ask the tree for more neighbours until enough of them are candidates
+        point = np.radians([[lat, lon]])
+        query_k = k
+        while True:
+            query_k = min(query_k, len(self))
+            if query_k == 0:
+                return []
+            distances, indices = self.tree.query(point, k=query_k)
+            distances, indices = distances[0], indices[0]
+            if candidates is not None:
+                matching = is_candidate[indices]
+                distances, indices = distances[matching], indices[matching]
+            if len(indices) >= limit or query_k == len(self):
+                return list(
+                    zip(
+                        self.project_ids[indices[:k]].tolist(),
+                        (distances[:k] * EARTH_RADIUS_KM).tolist(),
+                    )
+                )
+            query_k *= 4
+
+    def within_radius(self, lat: float, lon: float, radius_km: float) -> List[int]:
+        np = self._np
+        indices = self.tree.query_radius(
+            np.radians([[lat, lon]]), r=radius_km / EARTH_RADIUS_KM
+        )[0]
+        return self.project_ids[indices].tolist()
+
+    def within_polygon(self, polygon: Sequence[Tuple[float, float]]) -> List[int]:
+        """Return the projects inside a polygon given as (lat, lon) vertices."""
+        np = self._np
+        vertices = np.asarray(polygon, dtype=np.float64).reshape(-1, 2)
+        min_lat, min_lon = vertices.min(axis=0)
+        max_lat, max_lon = vertices.max(axis=0)
+
+        start = np.searchsorted(self._sorted_lats, min_lat, side="left")
+        end = np.searchsorted(self._sorted_lats, max_lat, side="right")
+        lats = self._sorted_lats[start:end]
+        lons = self._sorted_lons[start:end]
+        ids = self._sorted_ids[start:end]
+        in_box = (lons >= min_lon) & (lons <= max_lon)
+        lats, lons, ids = lats[in_box], lons[in_box], ids[in_box]
+
+        # Even-odd ray casting along the longitude axis
+        inside = np.zeros(len(ids), dtype=bool)
+        for (lat1, lon1), (lat2, lon2) in zip(vertices, np.roll(vertices, -1, axis=0)):
+            crosses = (lat1 > lats) != (lat2 > lats)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                edge_lon = lon1 + (lats - lat1) * (lon2 - lon1) / (lat2 - lat1)
+            inside ^= crosses & (lons < edge_lon)
+        return ids[inside].tolist()
+
+
+@functools.lru_cache(maxsize=2)
+def _spatial_index(db_path: str, version: str) -> ProjectSpatialIndex:
+    return ProjectSpatialIndex.from_db(SQLiteDatabase(db_path))
+
+
+def get_spatial_index(db: SQLiteDatabase) -> ProjectSpatialIndex:
+    """Spatial index for the current version of the database, built on first use."""
+    version, _ = db.get_version()
+    return _spatial_index(db.db_path, version)
+
+
+def filter_within_radius(
+    results: List[Dict], lat: float, lon: float, radius_km: float
+) -> List[Dict]:
+    """
+    Keep the SQL results within `radius_km` of the point, in their order. This
+    needs no index, so the default circle search does not pay for building one.
+    Rows whose coordinates are not decimal degrees are left out.
+    """
+    import numpy as np
+
+    kept, coordinates = [], []
+    for result in results:
+        lat_lon = decimal_degrees(result.get("latitude"), result.get("longitude"))
+        if lat_lon is not None:
+            kept.append(result)
+            coordinates.append(lat_lon)
+    if not kept:
+        return []
+    lats, lons = np.asarray(coordinates, dtype=np.float64).T
+    in_radius = haversine_km(lat, lon, lats, lons) <= radius_km
+    return [result for result, inside in zip(kept, in_radius) if inside]
+
+
+def filter_by_ids(results: List[Dict], project_ids: Iterable[int]) -> List[Dict]:
+    """Keep the SQL results for `project_ids`, in that order."""
+    by_id = {int(result["id"]): result for result in results}
+    return [by_id[project_id] for project_id in project_ids if project_id in by_id]
@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from "react";
+import React, { useState, useEffect, useRef } from "react";
 import {
   ThemeProvider,
   createTheme,
@@ -26,6 +26,11 @@ const theme = createTheme({
   },
 });
 
+// Fetch details for every marker in the background once results arrive
+const PREFETCH_PROJECT_DETAILS =
+  import.meta.env.VITE_PREFETCH_PROJECT_DETAILS === "true";
+const DETAILS_BATCH_SIZE = 500;
+
 const App: React.FC = () => {
   const [projects, setProjects] = useState<Project[]>([]);
   const [selectedProject, setSelectedProject] =
@@ -34,17 +39,55 @@ const App: React.FC = () => {
     null,
   );
 
+  const detailsCache = useRef<Map<number, ProjectDetailsType>>(new Map());
+
   useEffect(() => {
     setSelectedProject(null);
     setSelectedProjectId(null);
+    // Details are only reused within one result set. A new search starts with an
+    // empty cache, so its clicks go back to the server and revalidate via ETag.
+    // Responses for an earlier search still fill the map they were requested for.
+    const cache = new Map<number, ProjectDetailsType>();
+    detailsCache.current = cache;
+
+    if (!PREFETCH_PROJECT_DETAILS) return;
+    const controller = new AbortController();
+    const ids = projects.map((project) => project.id);
+    for (let i = 0; i < ids.length; i += DETAILS_BATCH_SIZE) {
+      const batch = ids.slice(i, i + DETAILS_BATCH_SIZE);
+      axios
+        .get<Record<string, ProjectDetailsType>>(
+          "http://localhost:5000/api/projects/details",
+          { params: { ids: batch.join(",") }, signal: controller.signal },
+        )
+        .then((response) => {
+          Object.entries(response.data).forEach(([id, details]) =>
+            cache.set(Number(id), details),
+          );
+        })
+        .catch((error) => {
+          if (!axios.isCancel(error)) {
+            console.error("Error prefetching project details:", error);
+          }
+        });
+    }
+    return () => controller.abort();
   }, [projects]);
 
   const handleMarkerClick = async (id: number) => {
+    const cache = detailsCache.current;
     try {
-      const response = await axios.get<ProjectDetailsType>(
-        `http://localhost:5000/api/project/${id}`,
-      );
-      setSelectedProject(response.data);
+      let details = cache.get(id);
+      if (!details) {
+        const response = await axios.get<ProjectDetailsType>(
+          `http://localhost:5000/api/project/${id}`,
+        );
+        details = response.data;
+        cache.set(id, details);
+      }
+      // A new search came in while the details were loading
+      if (cache !== detailsCache.current) return;
+      setSelectedProject(details);
       setSelectedProjectId(id);
     } catch (error) {
       console.error("Error fetching project details:", error);
@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from "react";
+import React, { useState, useEffect, useRef } from "react";
 import {
   Box,
   TextField,
@@ -10,6 +10,11 @@ import { TypeAnimation } from "react-type-animation";
 import axios from "axios";
 import { Project } from "../types";
 
+// Wait for a pause in typing before asking the backend to prepare the query
+const PREPARE_DEBOUNCE_MS = 600;
+// Identifies this tab so the backend can cancel work for queries it typed past
+const CLIENT_ID = crypto.randomUUID();
+
 interface SearchFormProps {
   setProjects: React.Dispatch<React.SetStateAction<Project[]>>;
 }
@@ -19,11 +24,22 @@ const SearchForm: React.FC<SearchFormProps> = ({ setProjects }) => {
   const [isLoading, setIsLoading] = useState<boolean>(false);
   const [isTyping, setIsTyping] = useState<boolean>(true);
   const [isFocused, setIsFocused] = useState<boolean>(false);
+  const prepareTimer = useRef<ReturnType<typeof setTimeout>>();
 
   useEffect(() => {
     axios.defaults.baseURL = "http://localhost:5000";
   }, []);
 
+  useEffect(() => {
+    if (query.trim().length === 0) return;
+    prepareTimer.current = setTimeout(() => {
+      axios
+        .post("/api/projects/prepare", { query, client_id: CLIENT_ID })
+        .catch((error) => console.error("Error preparing query:", error));
+    }, PREPARE_DEBOUNCE_MS);
+    return () => clearTimeout(prepareTimer.current);
+  }, [query]);
+
   const sampleQueries = [
     "Projects launched in 2022 near Electronic City",
     "Projects with bwssb water source near Marathahalli",
@@ -33,6 +49,8 @@ const SearchForm: React.FC<SearchFormProps> = ({ setProjects }) => {
 
   const handleSubmit = async (e: React.FormEvent) => {
     e.preventDefault();
+    // The search plans the query itself, a late prepare would only compete with it
+    clearTimeout(prepareTimer.current);
     setIsLoading(true);
     try {
       const response = await axios.post<Project[]>("/api/projects", { query });